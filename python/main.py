@@ -1,184 +1,283 @@
-#!/usr/bin/env python3
-"""
-Main entry point for the ESP32 Volume Control application.
-"""
-
-import sys
-import argparse
-import logging
-from modules.app import VolumeControlApp
-from modules import __version__
-
-# Set up basic logging before application starts
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",
-)
-
-logger = logging.getLogger(__name__)
-
-
-def print_banner():
-    """Print application banner"""
-    banner = f"""
-╔═════════════════════════════════════════════════════════╗
-║                ESP32 Home Automation                    ║
-║              Enhanced PC Volume Control                 ║
-║                    Version {__version__}                        ║
-╚═════════════════════════════════════════════════════════╝
-
-Features:
-• Bidirectional volume control with ESP32
-• Per-application volume control  
-• MQTT integration with auto-reconnection
-• System monitoring and power event detection
-• Sleep/wake detection and notification
-• System tray integration (optional)
-• Configurable settings and validation
-
-Author: DJ Kruger
-"""
-    print(banner)
-
-
-def main():
-    """Main entry point"""
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(
-        description="ESP32 Home Automation - Enhanced PC Volume Control",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  %(prog)s                          # Run with default settings
-  %(prog)s --config my_config.json  # Use custom configuration file
-  %(prog)s --no-tray                # Run without system tray
-  %(prog)s --debug                  # Enable debug logging
-  %(prog)s --tray --debug           # Force tray with debug logging
-
-Configuration:
-  The application uses a JSON configuration file for settings.
-  If no config file exists, a default one will be created.
-  
-  Default config file: volume_control_config.json
-        """,
-    )
-
-    parser.add_argument(
-        "--config",
-        "-c",
-        default="volume_control_config.json",
-        help="Configuration file path (default: volume_control_config.json)",
-    )
-
-    parser.add_argument(
-        "--tray",
-        action="store_true",
-        help="Force enable system tray interface (if available)",
-    )
-
-    parser.add_argument(
-        "--no-tray", action="store_true", help="Force disable system tray interface"
-    )
-
-    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-
-    parser.add_argument(
-        "--quiet",
-        "-q",
-        action="store_true",
-        help="Suppress banner and reduce console output",
-    )
-
-    parser.add_argument(
-        "--version", action="version", version=f"ESP32 Volume Control v{__version__}"
-    )
-
-    # Parse arguments
-    args = parser.parse_args()
-
-    # Validate argument combinations
-    if args.tray and args.no_tray:
-        parser.error("Cannot specify both --tray and --no-tray")
-
-    # Print banner unless quiet mode
-    if not args.quiet:
-        print_banner()
-
-    # Initialize application
-    try:
-        logger.info("Initializing ESP32 Volume Control Application...")
-
-        # Create application instance
-        app = VolumeControlApp(config_file=args.config)
-
-        # Initialize components first so we can access config_manager
-        if not app.initialize_components():
-            logger.error("Failed to initialize application components")
-            return 1
-
-        # Override configuration based on command line arguments
-        if args.debug:
-            # Enable debug mode in configuration
-            app.config_manager.set("settings.debug", True)
-            app.config_manager.set("settings.log_level", "DEBUG")
-            logger.info("Debug mode enabled via command line")
-
-        if args.tray:
-            app.config_manager.set("settings.enable_tray", True)
-            logger.info("System tray force enabled via command line")
-        elif args.no_tray:
-            app.config_manager.set("settings.enable_tray", False)
-            logger.info("System tray disabled via command line")
-
-        # Determine tray setting
-        enable_tray = not args.no_tray
-        if args.tray:
-            enable_tray = True
-
-        # Log startup information
-        logger.info(f"Configuration file: {args.config}")
-        logger.info(f"System tray: {'enabled' if enable_tray else 'disabled'}")
-        logger.info(f"Debug mode: {'enabled' if args.debug else 'disabled'}")
-
-        # Start the application
-        logger.info("Starting application...")
-        success = app.start(enable_tray=enable_tray)
-
-        if success:
-            logger.info("Application started successfully")
-            return 0
-        else:
-            logger.error("Application failed to start")
-            return 1
-
-    except KeyboardInterrupt:
-        logger.info("Application interrupted by user")
-        return 0
-
-    except FileNotFoundError as e:
-        logger.error(f"Configuration file not found: {e}")
-        logger.info("A default configuration file will be created on next run")
-        return 1
-
-    except PermissionError as e:
-        logger.error(f"Permission denied: {e}")
-        logger.info("Try running as administrator or check file permissions")
-        return 1
-
-    except ImportError as e:
-        logger.error(f"Missing required dependency: {e}")
-        logger.info("Please install required packages: pip install -r requirements.txt")
-        return 1
-
-    except Exception as e:
-        logger.error(f"Fatal error: {e}")
-        if args.debug:
-            import traceback
-
-            logger.error(f"Traceback: {traceback.format_exc()}")
-        return 1
-
-
-if __name__ == "__main__":
-    sys.exit(main())
+#!/usr/bin/env python3
+"""
+Main entry point for the ESP32 Volume Control application.
+"""
+
+import sys
+import logging
+from modules import __version__
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that reuses the formatted timestamp for records in the same second"""
+
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self._time_cache = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, cached_time = self._time_cache
+        if second != cached_second:
+            cached_time = super().formatTime(record, datefmt)
+            self._time_cache = (second, cached_time)
+        return cached_time
+
+
+# Set up basic logging before application starts
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(
+    _CachedTimeFormatter(
+        "%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%H:%M:%S",
+    )
+)
+logging.basicConfig(level=logging.INFO, handlers=[_console_handler])
+
+logger = logging.getLogger(__name__)
+
+
+# Application banner, formatted once at import
+_BANNER = f"""
+╔═════════════════════════════════════════════════════════╗
+║                ESP32 Home Automation                    ║
+║              Enhanced PC Volume Control                 ║
+║                    Version {__version__}                        ║
+╚═════════════════════════════════════════════════════════╝
+
+Features:
+• Bidirectional volume control with ESP32
+• Per-application volume control  
+• MQTT integration with auto-reconnection
+• System monitoring and power event detection
+• Sleep/wake detection and notification
+• System tray integration (optional)
+• Configurable settings and validation
+
+Author: DJ Kruger
+
+"""
+
+
+def print_banner():
+    """Print application banner"""
+    sys.stdout.write(_BANNER)
+    sys.stdout.flush()
+
+
+# Boolean flags handled by the fast-path parser: flag -> attribute
+_CLI_FLAGS = {
+    "--tray": "tray",
+    "--no-tray": "no_tray",
+    "--debug": "debug",
+    "--quiet": "quiet",
+    "-q": "quiet",
+}
+
+
+def _help_epilog():
+    """Examples and configuration notes shown at the end of --help"""
+    return """
+Examples:
+  %(prog)s                          # Run with default settings
+  %(prog)s --config my_config.json  # Use custom configuration file
+  %(prog)s --no-tray                # Run without system tray
+  %(prog)s --debug                  # Enable debug logging
+  %(prog)s --tray --debug           # Force tray with debug logging
+
+Configuration:
+  The application uses a JSON configuration file for settings.
+  If no config file exists, a default one will be created.
+  
+  Default config file: volume_control_config.json
+        """
+
+
+def _full_help():
+    """Build the argparse parser used for --help and anything the fast path doesn't handle"""
+    import argparse
+
+    class _HelpParser(argparse.ArgumentParser):
+        """ArgumentParser that attaches the examples epilog only when help is rendered"""
+
+        def format_help(self):
+            self.epilog = _help_epilog()
+            return super().format_help()
+
+    parser = _HelpParser(
+        description="ESP32 Home Automation - Enhanced PC Volume Control",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "--config",
+        "-c",
+        default="volume_control_config.json",
+        help="Configuration file path (default: volume_control_config.json)",
+    )
+
+    parser.add_argument(
+        "--tray",
+        action="store_true",
+        help="Force enable system tray interface (if available)",
+    )
+
+    parser.add_argument(
+        "--no-tray", action="store_true", help="Force disable system tray interface"
+    )
+
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="Suppress banner and reduce console output",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"ESP32 Volume Control v{__version__}"
+    )
+
+    return parser
+
+
+def parse_cli(argv):
+    """
+    Parse command line arguments without importing argparse on the common path
+
+    Help requests, unknown options and malformed values are handed to the
+    full argparse parser so usage and error output stay unchanged.
+
+    Args:
+        argv (list): Full argument vector including the program name
+
+    Returns:
+        types.SimpleNamespace: Parsed arguments
+    """
+    from types import SimpleNamespace
+
+    args = SimpleNamespace(
+        config="volume_control_config.json",
+        tray=False,
+        no_tray=False,
+        debug=False,
+        quiet=False,
+    )
+
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        attr = _CLI_FLAGS.get(arg)
+        if attr:
+            setattr(args, attr, True)
+        elif arg in ("--config", "-c") and i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+            i += 1
+            args.config = argv[i]
+        elif arg.startswith("--config="):
+            args.config = arg[len("--config="):]
+        elif arg == "--version":
+            sys.stdout.write(f"ESP32 Volume Control v{__version__}\n")
+            sys.exit(0)
+        else:
+            # -h/--help, abbreviations, unknown options, missing values
+            return _validate_args(_full_help().parse_args(argv[1:]))
+        i += 1
+
+    return _validate_args(args)
+
+
+def _validate_args(args):
+    """Reject conflicting argument combinations"""
+    if args.tray and args.no_tray:
+        _full_help().error("Cannot specify both --tray and --no-tray")
+    return args
+
+
+def main():
+    """Main entry point"""
+    # Parse command line arguments
+    args = parse_cli(sys.argv)
+
+    # Print banner unless quiet mode
+    if not args.quiet:
+        print_banner()
+
+    # Initialize application
+    try:
+        logger.info("Initializing ESP32 Volume Control Application...")
+
+        # Imported only once arguments are parsed so --help/--version and
+        # argument errors exit without loading the application package
+        from modules.app import VolumeControlApp
+
+        # Create application instance
+        app = VolumeControlApp(config_file=args.config)
+
+        # Initialize components first so we can access config_manager
+        if not app.initialize_components():
+            logger.error("Failed to initialize application components")
+            return 1
+
+        # Override configuration based on command line arguments
+        if args.debug:
+            # Enable debug mode in configuration
+            app.config_manager.set("settings.debug", True)
+            app.config_manager.set("settings.log_level", "DEBUG")
+            logger.info("Debug mode enabled via command line")
+
+        # Determine tray setting (--tray and --no-tray are mutually exclusive)
+        enable_tray = args.tray or not args.no_tray
+        if args.tray or args.no_tray:
+            app.config_manager.set("settings.enable_tray", enable_tray)
+            logger.info(
+                "System tray %s via command line",
+                "force enabled" if enable_tray else "disabled",
+            )
+
+        # Log startup information
+        logger.info("Configuration file: %s", args.config)
+        logger.info("System tray: %s", "enabled" if enable_tray else "disabled")
+        logger.info("Debug mode: %s", "enabled" if args.debug else "disabled")
+
+        # Start the application
+        logger.info("Starting application...")
+        success = app.start(enable_tray=enable_tray)
+
+        if success:
+            logger.info("Application started successfully")
+            return 0
+        else:
+            logger.error("Application failed to start")
+            return 1
+
+    except KeyboardInterrupt:
+        logger.info("Application interrupted by user")
+        return 0
+
+    except FileNotFoundError as e:
+        logger.error("Configuration file not found: %s", e)
+        logger.info("A default configuration file will be created on next run")
+        return 1
+
+    except PermissionError as e:
+        logger.error("Permission denied: %s", e)
+        logger.info("Try running as administrator or check file permissions")
+        return 1
+
+    except ImportError as e:
+        logger.error("Missing required dependency: %s", e)
+        logger.info("Please install required packages: pip install -r requirements.txt")
+        return 1
+
+    except Exception as e:
+        logger.error("Fatal error: %s", e)
+        if args.debug:
+            import traceback
+
+            logger.error("Traceback: %s", traceback.format_exc())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,19 @@
-"""
-ESP32 Home Automation - Enhanced PC Volume Control
-==================================================
-
-This package provides bidirectional volume control between ESP32 systems and PC audio.
-
-Features:
-- System-wide volume control via MQTT
-- Per-application volume control
-- Bidirectional volume synchronization
-- Automatic reconnection and error handling
-- System tray integration (optional)
-
-Author: DJ Kruger
-Version: 1.0.0
-"""
-
-__version__ = "1.0.0"
+"""
+ESP32 Home Automation - Enhanced PC Volume Control
+==================================================
+
+This package provides bidirectional volume control between ESP32 systems and PC audio.
+
+Features:
+- System-wide volume control via MQTT
+- Per-application volume control
+- Bidirectional volume synchronization
+- Automatic reconnection and error handling
+- System tray integration (optional)
+
+Author: DJ Kruger
+Version: 1.0.0
+"""
+
+__version__ = "1.0.0"
 __author__ = "DJ Kruger"
\ No newline at end of file
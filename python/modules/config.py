@@ -1,213 +1,436 @@
-"""
-Configuration management for the volume control system.
-"""
-
-import json
-import os
-import logging
-from .constants import DEFAULT_CONFIG
-
-logger = logging.getLogger(__name__)
-
-
-class ConfigManager:
-    """Enhanced configuration management with validation and persistence"""
-    
-    def __init__(self, config_file="volume_control_config.json"):
-        self.config_file = config_file
-        self.config = self.load_config()
-        self.validate_config()
-        logger.info(f"Configuration loaded from {config_file}")
-    
-    def load_config(self):
-        """Load configuration from file"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                # Merge with defaults to ensure all keys exist
-                config = self._merge_configs(DEFAULT_CONFIG, loaded_config)
-            else:
-                config = DEFAULT_CONFIG.copy()
-                self.save_config(config)
-                logger.info(f"Created default configuration file: {self.config_file}")
-            
-            return config
-            
-        except Exception as e:
-            logger.error(f"Error loading configuration: {e}")
-            logger.info("Using default configuration")
-            return DEFAULT_CONFIG.copy()
-    
-    def _merge_configs(self, default, loaded):
-        """Recursively merge configurations"""
-        result = default.copy()
-        for key, value in loaded.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._merge_configs(result[key], value)
-            else:
-                result[key] = value
-        return result
-    
-    def validate_config(self):
-        """Validate configuration values using schema"""
-        from .constants import CONFIG_SCHEMA
-        
-        try:
-            validation_errors = []
-            
-            # Validate each section
-            for section_name, section_schema in CONFIG_SCHEMA.items():
-                section_data = self.config.get(section_name, {})
-                
-                for field_name, field_schema in section_schema.items():
-                    field_path = f"{section_name}.{field_name}"
-                    value = section_data.get(field_name)
-                    
-                    # Check required fields
-                    if field_schema.get("required", False) and value is None:
-                        validation_errors.append(f"Required field missing: {field_path}")
-                        continue
-                    
-                    if value is None:
-                        continue
-                    
-                    # Check type
-                    expected_type = field_schema.get("type")
-                    if expected_type and not isinstance(value, expected_type):
-                        validation_errors.append(f"Invalid type for {field_path}: expected {expected_type.__name__}, got {type(value).__name__}")
-                        # Reset to default
-                        self._reset_to_default(section_name, field_name)
-                        continue
-                    
-                    # Check numeric ranges
-                    if expected_type in (int, float):
-                        min_val = field_schema.get("min")
-                        max_val = field_schema.get("max")
-                        if min_val is not None and value < min_val:
-                            validation_errors.append(f"Value too small for {field_path}: {value} < {min_val}")
-                            self._reset_to_default(section_name, field_name)
-                        elif max_val is not None and value > max_val:
-                            validation_errors.append(f"Value too large for {field_path}: {value} > {max_val}")
-                            self._reset_to_default(section_name, field_name)
-                    
-                    # Check choices
-                    choices = field_schema.get("choices")
-                    if choices and value not in choices:
-                        validation_errors.append(f"Invalid choice for {field_path}: {value} not in {choices}")
-                        self._reset_to_default(section_name, field_name)
-                    
-                    # Check list item types
-                    if expected_type == list:
-                        item_type = field_schema.get("item_type")
-                        if item_type:
-                            for i, item in enumerate(value):
-                                if not isinstance(item, item_type):
-                                    validation_errors.append(f"Invalid item type in {field_path}[{i}]: expected {item_type.__name__}")
-            
-            # Special validation for MQTT broker
-            mqtt_broker = self.config.get("mqtt", {}).get("broker")
-            if mqtt_broker == "192.168.1.xxx":
-                validation_errors.append("MQTT broker not configured - please update configuration")
-            
-            # Log validation results
-            if validation_errors:
-                for error in validation_errors:
-                    logger.warning(f"Configuration validation: {error}")
-            else:
-                logger.debug("Configuration validation completed successfully")
-            
-        except Exception as e:
-            logger.error(f"Error validating configuration: {e}")
-    
-    def _reset_to_default(self, section_name, field_name):
-        """Reset a configuration field to its default value"""
-        try:
-            default_value = DEFAULT_CONFIG[section_name][field_name]
-            self.config[section_name][field_name] = default_value
-            logger.info(f"Reset {section_name}.{field_name} to default: {default_value}")
-        except KeyError:
-            logger.error(f"No default value found for {section_name}.{field_name}")
-    
-    def save_config(self, config=None):
-        """Save configuration to file"""
-        try:
-            config_to_save = config or self.config
-            with open(self.config_file, 'w') as f:
-                json.dump(config_to_save, f, indent=2)
-            logger.debug(f"Configuration saved to {self.config_file}")
-            return True
-        except Exception as e:
-            logger.error(f"Error saving configuration: {e}")
-            return False
-    
-    def get(self, key_path, default=None):
-        """Get configuration value using dot notation (e.g., 'mqtt.broker')"""
-        try:
-            keys = key_path.split('.')
-            value = self.config
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
-    
-    def set(self, key_path, value):
-        """Set configuration value using dot notation"""
-        try:
-            keys = key_path.split('.')
-            config = self.config
-            for key in keys[:-1]:
-                if key not in config:
-                    config[key] = {}
-                config = config[key]
-            config[keys[-1]] = value
-            self.save_config()
-            logger.debug(f"Configuration updated: {key_path} = {value}")
-        except Exception as e:
-            logger.error(f"Error setting configuration {key_path}: {e}")
-    
-    def get_mqtt_config(self):
-        """Get MQTT configuration as a dictionary"""
-        return self.config.get("mqtt", {})
-    
-    def get_topics(self):
-        """Get MQTT topics configuration"""
-        return self.config.get("topics", {})
-    
-    def get_monitored_apps(self):
-        """Get list of monitored applications"""
-        return self.config.get("apps", [])
-    
-    def get_settings(self):
-        """Get application settings"""
-        return self.config.get("settings", {})
-
-
-def create_default_config():
-    """Create and return default configuration"""
-    return DEFAULT_CONFIG.copy()
-
-
-def load_config(config_file):
-    """Load configuration from JSON file (legacy function for compatibility)"""
-    try:
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                return json.load(f)
-        else:
-            return create_default_config()
-    except Exception as e:
-        logger.error(f"Error loading configuration from {config_file}: {e}")
-        return {}
-
-
-def save_config(config, config_file):
-    """Save configuration to JSON file (legacy function for compatibility)"""
-    try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving configuration: {e}")
+"""
+Configuration management for the volume control system.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import logging
+from .constants import CONFIG_SCHEMA, _FLAT_DEFAULTS, _FLAT_PATHS, _VALIDATE, fresh_default_config
+from .json_utils import orjson
+
+logger = logging.getLogger(__name__)
+
+# Parsed configuration files keyed by absolute path: (mtime_ns, size, data, digest)
+_CONFIG_CACHE = {}
+
+# Delay before a burst of set() calls is written to disk (seconds)
+_FLUSH_DELAY = 0.5
+
+# Sidecar file holding the digest of the last validated/saved configuration
+_DIGEST_SUFFIX = ".hash"
+
+# Sentinel for missing configuration sections
+_MISSING = object()
+
+# Fingerprint of the schema, mixed into every digest so a file validated
+# against an older CONFIG_SCHEMA is validated again after an upgrade
+_SCHEMA_FINGERPRINT = hashlib.blake2b(repr(CONFIG_SCHEMA).encode('utf-8'), digest_size=16).digest()
+
+
+@functools.lru_cache(maxsize=256)
+def _split_path(key_path):
+    """Split a dotted key path into a tuple of keys, caching the result"""
+    return tuple(key_path.split('.'))
+
+
+def _content_digest(data):
+    """Return the hex digest used to recognise unchanged configuration files under the current schema"""
+    digest = hashlib.blake2b(_SCHEMA_FINGERPRINT, digest_size=16)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _load_json_file(path, with_digest=False):
+    """
+    Parse a JSON file straight from a read-only memory map
+
+    Uses orjson when it is installed and falls back to the standard
+    library parser otherwise.
+
+    Args:
+        path (str): Path to the JSON file
+        with_digest (bool): Also return the digest of the raw file contents
+
+    Returns:
+        Parsed JSON data, or a (data, digest) tuple when with_digest is set
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        if os.fstat(fd).st_size == 0:
+            raise json.JSONDecodeError("Empty configuration file", "", 0)
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        try:
+            digest = _content_digest(mm) if with_digest else None
+            if orjson is not None:
+                with memoryview(mm) as view:
+                    data = orjson.loads(view)
+            else:
+                data = json.loads(mm[:])
+            return (data, digest) if with_digest else data
+        finally:
+            mm.close()
+    finally:
+        os.close(fd)
+
+
+def _read_config_file(config_file):
+    """
+    Read and parse a JSON configuration file, reusing the cached parse
+
+    The file is only re-parsed when its mtime or size changes. If reading or
+    parsing fails and a previous parse exists, the last good data is served.
+
+    Args:
+        config_file (str): Path to configuration file
+
+    Returns:
+        tuple: (config, digest) where config is a private copy the caller may
+            mutate and digest identifies the raw file contents
+    """
+    path = os.path.abspath(config_file)
+    cached = _CONFIG_CACHE.get(path)
+    
+    try:
+        stat = os.stat(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return copy.deepcopy(cached[2]), cached[3]
+        
+        data, digest = _load_json_file(path, with_digest=True)
+    except (OSError, ValueError) as e:
+        if cached is None:
+            raise
+        logger.warning(f"Error reading {config_file} ({e}), using last good configuration")
+        return copy.deepcopy(cached[2]), cached[3]
+    
+    _CONFIG_CACHE[path] = (stat.st_mtime_ns, stat.st_size, data, digest)
+    return copy.deepcopy(data), digest
+
+
+def _atomic_write(path, data):
+    """
+    Write bytes to a file so readers see either the old or the new contents
+
+    The data goes to a temporary file in the same directory, is flushed to
+    disk and then renamed over the target.
+
+    Args:
+        path (str): Destination file path
+        data (bytes): File contents
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.cfg.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_digest(config_file):
+    """Return the digest recorded next to a configuration file, if any"""
+    try:
+        with open(config_file + _DIGEST_SUFFIX, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_digest(config_file, digest):
+    """Record the digest of a known-good configuration file"""
+    try:
+        with open(config_file + _DIGEST_SUFFIX, 'w') as f:
+            f.write(digest)
+    except OSError as e:
+        logger.debug(f"Could not write configuration digest: {e}")
+
+
+class ConfigManager:
+    """Enhanced configuration management with validation and persistence"""
+    
+    def __init__(self, config_file="volume_control_config.json"):
+        self.config_file = config_file
+        self._file_digest = None
+        self._dirty = False
+        self._flush_timer = None
+        self._flush_lock = threading.Lock()
+        self.config, source = self.load_config()
+        
+        # Defaults and files that already passed validation skip the schema walk
+        if source == "file_changed":
+            if self.validate_config():
+                _write_digest(config_file, self._file_digest)
+        else:
+            broker_error = self._mqtt_broker_error()
+            if broker_error:
+                logger.warning(f"Configuration validation: {broker_error}")
+        
+        logger.info(f"Configuration loaded from {config_file}")
+    
+    def load_config(self):
+        """
+        Load configuration from file
+
+        Returns:
+            tuple: (config, source) where source is "default" when the
+                built-in defaults were used, "file_unchanged" when the file
+                matches its recorded digest and "file_changed" otherwise
+        """
+        try:
+            if os.path.exists(self.config_file):
+                loaded_config, digest = _read_config_file(self.config_file)
+                self._file_digest = digest
+                # Merge with defaults to ensure all keys exist
+                config = self._merge_configs(fresh_default_config(), loaded_config)
+                if digest == _read_digest(self.config_file):
+                    return config, "file_unchanged"
+                return config, "file_changed"
+            
+            config = fresh_default_config()
+            self.save_config(config)
+            logger.info(f"Created default configuration file: {self.config_file}")
+            return config, "default"
+            
+        except Exception as e:
+            logger.error(f"Error loading configuration: {e}")
+            logger.info("Using default configuration")
+            return fresh_default_config(), "default"
+    
+    def invalidate(self):
+        """Drop the cached parse of this configuration file so the next load re-reads it"""
+        _CONFIG_CACHE.pop(os.path.abspath(self.config_file), None)
+    
+    def _merge_configs(self, default, loaded):
+        """
+        Merge loaded configuration values over the defaults
+
+        The merge is done in place on ``default``, which must be a private
+        copy such as one from fresh_default_config().
+
+        Args:
+            default (dict): Default configuration to merge into
+            loaded (dict): Configuration read from file
+
+        Returns:
+            dict: The merged configuration (``default``)
+        """
+        stack = [(default, loaded)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                if isinstance(value, dict) and isinstance(target.get(key), dict):
+                    stack.append((target[key], value))
+                else:
+                    target[key] = value
+        return default
+    
+    def validate_config(self):
+        """
+        Validate configuration values using schema
+
+        Returns:
+            bool: True if every field passed the schema checks
+        """
+        try:
+            validation_errors = []
+            
+            # Run the validator generated from CONFIG_SCHEMA
+            _VALIDATE(self.config, validation_errors, self._reset_to_default)
+            
+            schema_valid = not validation_errors
+            
+            # Special validation for MQTT broker
+            broker_error = self._mqtt_broker_error()
+            if broker_error:
+                validation_errors.append(broker_error)
+            
+            # Log validation results
+            if validation_errors:
+                for error in validation_errors:
+                    logger.warning(f"Configuration validation: {error}")
+            else:
+                logger.debug("Configuration validation completed successfully")
+            
+            return schema_valid
+            
+        except Exception as e:
+            logger.error(f"Error validating configuration: {e}")
+            return False
+    
+    def _mqtt_broker_error(self):
+        """Return a warning if the MQTT broker is still the placeholder address"""
+        if self.config.get("mqtt", {}).get("broker") == "192.168.1.xxx":
+            return "MQTT broker not configured - please update configuration"
+        return None
+    
+    def _reset_to_default(self, section_name, field_name):
+        """Reset a configuration field to its default value"""
+        try:
+            default_value = copy.deepcopy(_FLAT_DEFAULTS[f"{section_name}.{field_name}"])
+            self.config[section_name][field_name] = default_value
+            logger.info(f"Reset {section_name}.{field_name} to default: {default_value}")
+        except KeyError:
+            logger.error(f"No default value found for {section_name}.{field_name}")
+    
+    def save_config(self, config=None):
+        """Save configuration to file"""
+        try:
+            config_to_save = config or self.config
+            data = json.dumps(config_to_save, indent=2).encode('utf-8')
+            _atomic_write(self.config_file, data)
+            # Record the digest so the next startup can skip validation, but
+            # only for values that pass the schema (set() doesn't check them);
+            # otherwise the stale digest makes the next startup validate
+            errors = []
+            _VALIDATE(config_to_save, errors, lambda section, field: None)
+            if not errors:
+                _write_digest(self.config_file, _content_digest(data))
+            logger.debug(f"Configuration saved to {self.config_file}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving configuration: {e}")
+            return False
+    
+    def get(self, key_path, default=None):
+        """Get configuration value using dot notation (e.g., 'mqtt.broker')"""
+        try:
+            keys = _FLAT_PATHS.get(key_path) or _split_path(key_path)
+            value = self.config
+            for key in keys:
+                value = value[key]
+            return value
+        except (KeyError, TypeError):
+            return default
+    
+    def get_many(self, key_paths, default=None):
+        """
+        Get several configuration values using dot notation in one pass
+
+        Each top-level section is looked up once no matter how many keys
+        share it.
+
+        Args:
+            key_paths (list): Dotted key paths (e.g., ['mqtt.broker', 'mqtt.port'])
+            default: Value used for missing keys
+
+        Returns:
+            dict: Mapping of each key path to its value
+        """
+        values = {}
+        sections = {}
+        for key_path in key_paths:
+            keys = _FLAT_PATHS.get(key_path) or _split_path(key_path)
+            section = keys[0]
+            value = sections.get(section, _MISSING)
+            if value is _MISSING:
+                value = sections[section] = self.config.get(section, _MISSING)
+            try:
+                for key in keys[1:]:
+                    value = value[key]
+            except (KeyError, TypeError):
+                value = _MISSING
+            values[key_path] = default if value is _MISSING else value
+        return values
+    
+    def set(self, key_path, value):
+        """Set configuration value using dot notation"""
+        try:
+            keys = _FLAT_PATHS.get(key_path) or _split_path(key_path)
+            # Mutate under the flush lock so _flush() never copies a half-made change
+            with self._flush_lock:
+                config = self.config
+                for key in keys[:-1]:
+                    if key not in config:
+                        config[key] = {}
+                    config = config[key]
+                config[keys[-1]] = value
+            self._schedule_flush()
+            logger.debug(f"Configuration updated: {key_path} = {value}")
+        except Exception as e:
+            logger.error(f"Error setting configuration {key_path}: {e}")
+    
+    def _schedule_flush(self):
+        """Mark the configuration dirty and (re)start the delayed save"""
+        with self._flush_lock:
+            self._dirty = True
+            if self._flush_timer:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(_FLUSH_DELAY, self._flush)
+            # cleanup() flushes synchronously, so the timer needn't hold up exit
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _flush(self):
+        """Write pending configuration changes to disk, retrying later if the write fails"""
+        with self._flush_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._flush_timer = None
+            # Serialize from a snapshot so later set() calls can't change it mid-write
+            snapshot = copy.deepcopy(self.config)
+        if not self.save_config(snapshot):
+            self._schedule_flush()
+    
+    def cleanup(self):
+        """Cancel the delayed save and write any pending changes immediately"""
+        with self._flush_lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self._flush()
+    
+    def get_mqtt_config(self):
+        """Get MQTT configuration as a dictionary"""
+        return self.config.get("mqtt", {})
+    
+    def get_topics(self):
+        """Get MQTT topics configuration"""
+        return self.config.get("topics", {})
+    
+    def get_monitored_apps(self):
+        """Get list of monitored applications"""
+        return self.config.get("apps", [])
+    
+    def get_settings(self):
+        """Get application settings"""
+        return self.config.get("settings", {})
+
+
+def create_default_config():
+    """Create and return default configuration"""
+    return fresh_default_config()
+
+
+def load_config(config_file):
+    """Load configuration from JSON file (legacy function for compatibility)"""
+    try:
+        if os.path.exists(config_file):
+            return _load_json_file(config_file)
+        else:
+            return create_default_config()
+    except Exception as e:
+        logger.error(f"Error loading configuration from {config_file}: {e}")
+        return {}
+
+
+def save_config(config, config_file):
+    """Save configuration to JSON file (legacy function for compatibility)"""
+    try:
+        _atomic_write(config_file, json.dumps(config, indent=2).encode('utf-8'))
+        return True
+    except Exception as e:
+        logger.error(f"Error saving configuration: {e}")
         return False
\ No newline at end of file
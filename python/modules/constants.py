@@ -1,159 +1,302 @@
-"""
-Constants and configuration defaults for the volume control system.
-"""
-
-# MQTT Settings - Default values (can be overridden by configuration)
-DEFAULT_MQTT_BROKER = "192.168.1.xxx"  # Change to your broker IP
-DEFAULT_MQTT_PORT = 1883
-DEFAULT_MQTT_USERNAME = ""  # Leave empty if not required
-DEFAULT_MQTT_PASSWORD = ""  # Leave empty if not required
-DEFAULT_MQTT_CLIENT_ID = "PCVolumeControl"
-
-# MQTT Topics
-MQTT_TOPICS = {
-    "volume": "homecontrol/volume",
-    "command": "homecontrol/command", 
-    "status": "homecontrol/pc/status",
-    "pc_volume": "homecontrol/pc/volume",
-    "app_volume": "homecontrol/pc/app_volume",
-    "pc_power": "homecontrol/pc/power",
-    "pc_system": "homecontrol/pc/system"
-}
-
-# Application Settings
-DEFAULT_UPDATE_RATE_LIMIT = 0.1  # Minimum seconds between volume updates
-DEFAULT_SYNC_INTERVAL = 2.0  # Seconds between volume sync checks
-DEFAULT_RECONNECT_DELAY = 5.0  # Seconds between reconnection attempts
-DEFAULT_DEBUG = True  # Set to False to reduce console output
-DEFAULT_CONFIG_FILE = "volume_control_config.json"
-
-# Per-application volume control settings
-DEFAULT_MONITORED_APPS = [
-    "chrome.exe",
-    "firefox.exe", 
-    "spotify.exe",
-    "discord.exe",
-    "vlc.exe",
-    "winamp.exe",
-    "foobar2000.exe"
-]
-
-# Default configuration structure
-DEFAULT_CONFIG = {
-    "mqtt": {
-        "broker": DEFAULT_MQTT_BROKER,
-        "port": DEFAULT_MQTT_PORT,
-        "username": DEFAULT_MQTT_USERNAME,
-        "password": DEFAULT_MQTT_PASSWORD,
-        "client_id": DEFAULT_MQTT_CLIENT_ID,
-        "keepalive": 60,
-        "qos": 1,
-        "retain": True
-    },
-    "topics": MQTT_TOPICS,
-    "settings": {
-        "update_rate_limit": DEFAULT_UPDATE_RATE_LIMIT,
-        "sync_interval": DEFAULT_SYNC_INTERVAL,
-        "reconnect_delay": DEFAULT_RECONNECT_DELAY,
-        "debug": DEFAULT_DEBUG,
-        "enable_mqtt": True,
-        "enable_system_monitoring": True,
-        "enable_tray": True,
-        "monitor_interval": 5,
-        "status_publish_interval": 60,
-        "log_level": "DEBUG",
-        "log_file": "volume_control.log",
-        "max_log_size_mb": 10,
-        "backup_log_count": 3
-    },
-    "apps": {
-        "monitored": DEFAULT_MONITORED_APPS
-    },
-    "power_management": {
-        "detect_sleep_wake": True,
-        "notify_esp32_on_sleep": True,
-        "notify_esp32_on_wake": True,
-        "idle_threshold_minutes": 30,
-        "sleep_detection_method": "activity"  # "activity" or "wmi"
-    },
-    "diagnostics": {
-        "enable_performance_monitoring": True,
-        "collect_system_metrics": True,
-        "publish_diagnostics": True,
-        "diagnostic_interval": 300  # 5 minutes
-    }
-}
-
-# Configuration validation schema
-CONFIG_SCHEMA = {
-    "mqtt": {
-        "broker": {"type": str, "required": True},
-        "port": {"type": int, "min": 1, "max": 65535},
-        "username": {"type": str, "required": False},
-        "password": {"type": str, "required": False},
-        "client_id": {"type": str, "required": True},
-        "keepalive": {"type": int, "min": 10, "max": 3600},
-        "qos": {"type": int, "min": 0, "max": 2},
-        "retain": {"type": bool}
-    },
-    "topics": {
-        "volume": {"type": str, "required": True},
-        "command": {"type": str, "required": True},
-        "status": {"type": str, "required": True},
-        "pc_volume": {"type": str, "required": True},
-        "app_volume": {"type": str, "required": True},
-        "pc_power": {"type": str, "required": True},
-        "pc_system": {"type": str, "required": True}
-    },
-    "settings": {
-        "update_rate_limit": {"type": float, "min": 0.01, "max": 1.0},
-        "sync_interval": {"type": float, "min": 0.5, "max": 60.0},
-        "reconnect_delay": {"type": float, "min": 1.0, "max": 300.0},
-        "debug": {"type": bool},
-        "enable_mqtt": {"type": bool},
-        "enable_system_monitoring": {"type": bool},
-        "enable_tray": {"type": bool},
-        "monitor_interval": {"type": int, "min": 1, "max": 60},
-        "status_publish_interval": {"type": int, "min": 10, "max": 3600},
-        "log_level": {"type": str, "choices": ["DEBUG", "INFO", "WARNING", "ERROR"]},
-        "log_file": {"type": str},
-        "max_log_size_mb": {"type": int, "min": 1, "max": 100},
-        "backup_log_count": {"type": int, "min": 1, "max": 10}
-    },
-    "apps": {
-        "monitored": {"type": list, "item_type": str}
-    },
-    "power_management": {
-        "detect_sleep_wake": {"type": bool},
-        "notify_esp32_on_sleep": {"type": bool},
-        "notify_esp32_on_wake": {"type": bool},
-        "idle_threshold_minutes": {"type": int, "min": 1, "max": 1440},
-        "sleep_detection_method": {"type": str, "choices": ["activity", "wmi"]}
-    },
-    "diagnostics": {
-        "enable_performance_monitoring": {"type": bool},
-        "collect_system_metrics": {"type": bool},
-        "publish_diagnostics": {"type": bool},
-        "diagnostic_interval": {"type": int, "min": 60, "max": 3600}
-    }
-}
-
-# Optional dependency availability flags
-TRAY_AVAILABLE = False
-WINDOWS_MONITORING = False
-
-try:
-    import pystray
-    from PIL import Image, ImageDraw
-    TRAY_AVAILABLE = True
-except ImportError:
-    pass
-
-try:
-    import win32api
-    import win32con
-    import win32gui
-    import wmi
-    WINDOWS_MONITORING = True
-except ImportError:
-    pass
\ No newline at end of file
+"""
+Constants and configuration defaults for the volume control system.
+"""
+
+import importlib.util
+import pickle
+import sys
+import types
+
+# MQTT Settings - Default values (can be overridden by configuration)
+DEFAULT_MQTT_BROKER = "192.168.1.xxx"  # Change to your broker IP
+DEFAULT_MQTT_PORT = 1883
+DEFAULT_MQTT_USERNAME = ""  # Leave empty if not required
+DEFAULT_MQTT_PASSWORD = ""  # Leave empty if not required
+DEFAULT_MQTT_CLIENT_ID = "PCVolumeControl"
+
+# MQTT Topics
+_MQTT_TOPICS_RAW = {
+    key: sys.intern(topic)
+    for key, topic in {
+        "volume": "homecontrol/volume",
+        "command": "homecontrol/command", 
+        "status": "homecontrol/pc/status",
+        "pc_volume": "homecontrol/pc/volume",
+        "app_volume": "homecontrol/pc/app_volume",
+        "pc_power": "homecontrol/pc/power",
+        "pc_system": "homecontrol/pc/system"
+    }.items()
+}
+
+# Read-only view of the default topics
+MQTT_TOPICS = types.MappingProxyType(_MQTT_TOPICS_RAW)
+
+# Application Settings
+DEFAULT_UPDATE_RATE_LIMIT = 0.1  # Minimum seconds between volume updates
+DEFAULT_SYNC_INTERVAL = 2.0  # Seconds between volume sync checks
+DEFAULT_RECONNECT_DELAY = 5.0  # Seconds between reconnection attempts
+DEFAULT_DEBUG = True  # Set to False to reduce console output
+DEFAULT_CONFIG_FILE = "volume_control_config.json"
+
+# Per-application volume control settings
+DEFAULT_MONITORED_APPS = [
+    "chrome.exe",
+    "firefox.exe", 
+    "spotify.exe",
+    "discord.exe",
+    "vlc.exe",
+    "winamp.exe",
+    "foobar2000.exe"
+]
+
+# Default configuration structure
+DEFAULT_CONFIG = {
+    "mqtt": {
+        "broker": DEFAULT_MQTT_BROKER,
+        "port": DEFAULT_MQTT_PORT,
+        "username": DEFAULT_MQTT_USERNAME,
+        "password": DEFAULT_MQTT_PASSWORD,
+        "client_id": DEFAULT_MQTT_CLIENT_ID,
+        "keepalive": 60,
+        "qos": 1,
+        "telemetry_qos": 0,
+        "retain": True,
+        "protocol": "MQTTv311"  # "MQTTv5" to opt in
+    },
+    "topics": dict(_MQTT_TOPICS_RAW),
+    "settings": {
+        "update_rate_limit": DEFAULT_UPDATE_RATE_LIMIT,
+        "sync_interval": DEFAULT_SYNC_INTERVAL,
+        "reconnect_delay": DEFAULT_RECONNECT_DELAY,
+        "debug": DEFAULT_DEBUG,
+        "enable_mqtt": True,
+        "enable_system_monitoring": True,
+        "enable_tray": True,
+        "monitor_interval": 5,
+        "power_poll_interval": None,  # None follows monitor_interval
+        "cpu_sample_interval": 15,
+        "status_publish_interval": 60,
+        "app_volume_linger_ms": 0,
+        "log_level": "DEBUG",
+        "log_file": "volume_control.log",
+        "max_log_size_mb": 10,
+        "backup_log_count": 3
+    },
+    "apps": {
+        "monitored": DEFAULT_MONITORED_APPS
+    },
+    "power_management": {
+        "detect_sleep_wake": True,
+        "notify_esp32_on_sleep": True,
+        "notify_esp32_on_wake": True,
+        "idle_threshold_minutes": 30,
+        "sleep_detection_method": "activity"  # "activity" or "wmi"
+    },
+    "diagnostics": {
+        "enable_performance_monitoring": True,
+        "collect_system_metrics": True,
+        "publish_diagnostics": True,
+        "diagnostic_interval": 300,  # 5 minutes
+        "include_open_files": False  # Scanning open handles is slow on Windows
+    }
+}
+
+# Serialized once so each caller can get an independent deep copy cheaply.
+# DEFAULT_CONFIG is shared; callers that modify defaults should work on a
+# copy from fresh_default_config() instead.
+_DEFAULT_CONFIG_BLOB = pickle.dumps(DEFAULT_CONFIG, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def fresh_default_config():
+    """Return an independent, mutable deep copy of the default configuration"""
+    return pickle.loads(_DEFAULT_CONFIG_BLOB)
+
+
+def _flatten_config(config):
+    """
+    Map every leaf of a nested configuration to its dotted path
+
+    Args:
+        config (dict): Nested configuration
+
+    Returns:
+        tuple: ({dotted path: key tuple}, {dotted path: default value})
+    """
+    paths = {}
+    defaults = {}
+    stack = [((), config)]
+    while stack:
+        prefix, section = stack.pop()
+        for key, value in section.items():
+            keys = prefix + (key,)
+            if isinstance(value, dict):
+                stack.append((keys, value))
+            else:
+                dotted = ".".join(keys)
+                paths[dotted] = keys
+                defaults[dotted] = value
+    return paths, defaults
+
+
+# Known leaf paths of the default configuration, pre-split for ConfigManager
+_FLAT_PATHS, _FLAT_DEFAULTS = _flatten_config(DEFAULT_CONFIG)
+
+
+# Configuration validation schema
+CONFIG_SCHEMA = {
+    "mqtt": {
+        "broker": {"type": str, "required": True},
+        "port": {"type": int, "min": 1, "max": 65535},
+        "username": {"type": str, "required": False},
+        "password": {"type": str, "required": False},
+        "client_id": {"type": str, "required": True},
+        "keepalive": {"type": int, "min": 10, "max": 3600},
+        "qos": {"type": int, "min": 0, "max": 2},
+        "telemetry_qos": {"type": int, "min": 0, "max": 2},
+        "retain": {"type": bool},
+        "protocol": {"type": str, "choices": ["MQTTv311", "MQTTv5"]}
+    },
+    "topics": {
+        "volume": {"type": str, "required": True},
+        "command": {"type": str, "required": True},
+        "status": {"type": str, "required": True},
+        "pc_volume": {"type": str, "required": True},
+        "app_volume": {"type": str, "required": True},
+        "pc_power": {"type": str, "required": True},
+        "pc_system": {"type": str, "required": True}
+    },
+    "settings": {
+        "update_rate_limit": {"type": float, "min": 0.01, "max": 1.0},
+        "sync_interval": {"type": float, "min": 0.5, "max": 60.0},
+        "reconnect_delay": {"type": float, "min": 1.0, "max": 300.0},
+        "debug": {"type": bool},
+        "enable_mqtt": {"type": bool},
+        "enable_system_monitoring": {"type": bool},
+        "enable_tray": {"type": bool},
+        "monitor_interval": {"type": int, "min": 1, "max": 60},
+        "power_poll_interval": {"type": int, "min": 1, "max": 60},
+        "cpu_sample_interval": {"type": int, "min": 1, "max": 300},
+        "status_publish_interval": {"type": int, "min": 10, "max": 3600},
+        "app_volume_linger_ms": {"type": int, "min": 0, "max": 1000},
+        "log_level": {"type": str, "choices": ["DEBUG", "INFO", "WARNING", "ERROR"]},
+        "log_file": {"type": str},
+        "max_log_size_mb": {"type": int, "min": 1, "max": 100},
+        "backup_log_count": {"type": int, "min": 1, "max": 10}
+    },
+    "apps": {
+        "monitored": {"type": list, "item_type": str}
+    },
+    "power_management": {
+        "detect_sleep_wake": {"type": bool},
+        "notify_esp32_on_sleep": {"type": bool},
+        "notify_esp32_on_wake": {"type": bool},
+        "idle_threshold_minutes": {"type": int, "min": 1, "max": 1440},
+        "sleep_detection_method": {"type": str, "choices": ["activity", "wmi"]}
+    },
+    "diagnostics": {
+        "enable_performance_monitoring": {"type": bool},
+        "collect_system_metrics": {"type": bool},
+        "publish_diagnostics": {"type": bool},
+        "diagnostic_interval": {"type": int, "min": 60, "max": 3600},
+        "include_open_files": {"type": bool}
+    }
+}
+
+
+def _build_validator(schema):
+    """
+    Generate a straight-line validation function for a configuration schema
+
+    The returned function has the signature ``validate(config, errors, reset)``.
+    It appends a message to ``errors`` for every problem found and calls
+    ``reset(section, field)`` for values that must fall back to their default.
+    Range bounds are only checked for numeric fields and item types only for
+    list fields.
+
+    Args:
+        schema (dict): Schema in the CONFIG_SCHEMA layout
+
+    Returns:
+        function: Compiled validator
+    """
+    namespace = {}
+    
+    def const(value):
+        """Bind a schema value into the generated function's namespace"""
+        name = f"_c{len(namespace)}"
+        namespace[name] = value
+        return name
+    
+    lines = ["def _validate(config, errors, reset):"]
+    for section_name, section_schema in schema.items():
+        lines.append(f"    section = config.get({section_name!r}, {{}})")
+        for field_name, field_schema in section_schema.items():
+            path = f"{section_name}.{field_name}"
+            reset_call = f"reset({section_name!r}, {field_name!r})"
+            expected_type = field_schema.get("type")
+            
+            lines.append(f"    v = section.get({field_name!r})")
+            lines.append("    if v is None:")
+            if field_schema.get("required", False):
+                lines.append(f"        errors.append({f'Required field missing: {path}'!r})")
+            else:
+                lines.append("        pass")
+            
+            if expected_type:
+                type_name = const(expected_type)
+                lines.append(f"    elif not isinstance(v, {type_name}):")
+                lines.append(f"        errors.append(f'Invalid type for {path}: expected {expected_type.__name__}, got {{type(v).__name__}}')")
+                lines.append(f"        {reset_call}")
+            
+            checks = []
+            if expected_type in (int, float):
+                min_val = field_schema.get("min")
+                max_val = field_schema.get("max")
+                bounds = []
+                if min_val is not None:
+                    bounds.append(("<", const(min_val), "small"))
+                if max_val is not None:
+                    bounds.append((">", const(max_val), "large"))
+                for index, (op, bound, word) in enumerate(bounds):
+                    keyword = "if" if index == 0 else "elif"
+                    checks.append(f"{keyword} v {op} {bound}:")
+                    checks.append(f"    errors.append(f'Value too {word} for {path}: {{v}} {op} {{{bound}}}')")
+                    checks.append(f"    {reset_call}")
+            
+            choices = field_schema.get("choices")
+            if choices:
+                choices_name = const(choices)
+                checks.append(f"if v not in {choices_name}:")
+                checks.append(f"    errors.append(f'Invalid choice for {path}: {{v}} not in {{{choices_name}}}')")
+                checks.append(f"    {reset_call}")
+            
+            item_type = field_schema.get("item_type") if expected_type == list else None
+            if item_type:
+                item_name = const(item_type)
+                checks.append("for i, item in enumerate(v):")
+                checks.append(f"    if not isinstance(item, {item_name}):")
+                checks.append(f"        errors.append(f'Invalid item type in {path}[{{i}}]: expected {item_type.__name__}')")
+            
+            if checks:
+                lines.append("    else:")
+                lines.extend(f"        {line}" for line in checks)
+    
+    exec(compile("\n".join(lines) + "\n", "<config schema>", "exec"), namespace)
+    return namespace["_validate"]
+
+
+# Validator generated once from CONFIG_SCHEMA for validate_config
+_VALIDATE = _build_validator(CONFIG_SCHEMA)
+
+# Optional dependency availability flags
+TRAY_AVAILABLE = False
+WINDOWS_MONITORING = False
+
+# Probe for the tray stack without importing it; pystray/PIL are only loaded
+# by tray_ui when a tray is actually created.
+if importlib.util.find_spec("pystray") and importlib.util.find_spec("PIL"):
+    TRAY_AVAILABLE = True
+
+# Same for the pywin32/WMI stack, which system_monitor imports on use
+if all(importlib.util.find_spec(name) for name in ("win32api", "win32con", "win32gui", "wmi")):
+    WINDOWS_MONITORING = True
\ No newline at end of file
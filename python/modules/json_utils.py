@@ -0,0 +1,32 @@
+"""
+JSON helpers shared by the volume control modules.
+"""
+
+import dataclasses
+import json
+
+# Optional fast JSON encoder/decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(obj):
+    """Let the standard library encoder handle payload dataclasses"""
+    if dataclasses.is_dataclass(obj):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    """Serialize to a compact JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        # orjson walks dataclasses natively, without a dict copy
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(',', ':'), default=_json_default)
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch the standard library exception either way
+_loads = orjson.loads if orjson is not None else json.loads
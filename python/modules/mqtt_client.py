@@ -1,431 +1,821 @@
-"""
-MQTT client for volume control communication.
-"""
-
-import json
-import time
-import threading
-import logging
-import paho.mqtt.client as mqtt
-
-logger = logging.getLogger(__name__)
-
-
-class MQTTVolumeClient:
-    """Enhanced MQTT client with bidirectional sync and per-app control"""
-    
-    def __init__(self, volume_controller, config_manager):
-        """
-        Initialize MQTT client
-        
-        Args:
-            volume_controller: Volume controller instance
-            config_manager: Configuration manager instance
-        """
-        self.volume_controller = volume_controller
-        self.config_manager = config_manager
-        self.connected = False
-        self.running = False
-        self.sync_thread = None
-        self.reconnect_thread = None
-        self.system_monitor = None
-        
-        # Get configuration
-        mqtt_config = config_manager.get_mqtt_config()
-        self.topics = config_manager.get_topics()
-        settings = config_manager.get_settings()
-        
-        self.broker = mqtt_config.get("broker")
-        self.port = mqtt_config.get("port", 1883)
-        self.username = mqtt_config.get("username", "")
-        self.password = mqtt_config.get("password", "")
-        self.client_id = mqtt_config.get("client_id", "PCVolumeControl")
-        self.keepalive = mqtt_config.get("keepalive", 60)
-        self.qos = mqtt_config.get("qos", 1)
-        self.retain = mqtt_config.get("retain", True)
-        
-        self.sync_interval = settings.get("sync_interval", 2.0)
-        self.reconnect_delay = settings.get("reconnect_delay", 5.0)
-        
-        # Initialize MQTT client
-        self.client = mqtt.Client(client_id=self.client_id)
-        
-        # Set callbacks
-        self.client.on_connect = self.on_connect
-        self.client.on_disconnect = self.on_disconnect
-        self.client.on_message = self.on_message
-        
-        # Set authentication if provided
-        if self.username and self.password:
-            self.client.username_pw_set(self.username, self.password)
-        
-        # Set will message for clean disconnection
-        will_payload = json.dumps({"status": "offline", "client_id": self.client_id})
-        self.client.will_set(self.topics.get("status"), will_payload, retain=self.retain)
-        
-        logger.info(f"MQTT client initialized for broker {self.broker}:{self.port}")
-    
-    def connect(self):
-        """Connect to MQTT broker"""
-        try:
-            if not self.broker or self.broker == "192.168.1.xxx":
-                logger.error("MQTT broker not configured")
-                return False
-                
-            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-            self.client.connect(self.broker, self.port, self.keepalive)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to MQTT broker: {e}")
-            return False
-    
-    def on_connect(self, client, userdata, flags, rc):
-        """Callback for when client connects to broker"""
-        if rc == 0:
-            self.connected = True
-            logger.info("Connected to MQTT broker successfully")
-            
-            # Subscribe to topics
-            topics_to_subscribe = [
-                self.topics.get("volume"),
-                self.topics.get("command"),
-                self.topics.get("app_volume")
-            ]
-            
-            for topic in topics_to_subscribe:
-                if topic:
-                    client.subscribe(topic, self.qos)
-                    logger.info(f"Subscribed to {topic}")
-            
-            # Publish online status
-            self.publish_status("online")
-            
-            # Start volume sync thread
-            if not self.sync_thread or not self.sync_thread.is_alive():
-                self.running = True
-                self.sync_thread = threading.Thread(target=self._volume_sync_loop, daemon=True)
-                self.sync_thread.start()
-                logger.info("Volume sync thread started")
-            
-        else:
-            logger.error(f"Connection failed with code {rc}")
-            self.connected = False
-    
-    def on_disconnect(self, client, userdata, rc):
-        """Callback for when client disconnects from broker"""
-        self.connected = False
-        if rc != 0:
-            logger.warning(f"Unexpected disconnection (code: {rc}), attempting to reconnect...")
-        else:
-            logger.info("Disconnected from MQTT broker")
-    
-    def on_message(self, client, userdata, msg):
-        """
-        Callback for when a message is received
-        
-        Args:
-            client: MQTT client instance
-            userdata: User data
-            msg: MQTT message
-        """
-        try:
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8')
-            
-            logger.debug(f"Received message on {topic}: {payload}")
-            
-            # Handle volume topic
-            if topic == self.topics.get("volume"):
-                self._handle_volume_message(payload)
-            
-            # Handle command topic
-            elif topic == self.topics.get("command"):
-                self.handle_command(payload)
-            
-            # Handle per-app volume topic
-            elif topic == self.topics.get("app_volume"):
-                self.handle_app_volume_command(payload)
-        
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-    
-    def _handle_volume_message(self, payload):
-        """Handle volume control messages"""
-        try:
-            volume_level = int(payload)
-            if self.volume_controller.set_volume(volume_level):
-                logger.info(f"Volume set to {volume_level}%")
-        except ValueError:
-            logger.warning(f"Invalid volume value: {payload}")
-        except Exception as e:
-            logger.error(f"Error handling volume message: {e}")
-    
-    def handle_command(self, command):
-        """
-        Handle special commands
-        
-        Args:
-            command (str): Command string
-        """
-        try:
-            command = command.upper()
-            
-            if command == "MUTE":
-                self.volume_controller.mute()
-            elif command == "UNMUTE":
-                self.volume_controller.unmute()
-            elif command == "STATUS":
-                self.publish_status("online")
-            elif command == "GETVOLUME":
-                vol = self.volume_controller.get_volume()
-                self.client.publish(self.topics.get("volume"), str(vol), qos=self.qos)
-                logger.info(f"Published current volume: {vol}%")
-            elif command == "REFRESH_APPS":
-                self.volume_controller.refresh_applications()
-                self.publish_app_volumes()
-            elif command == "GET_APP_VOLUMES":
-                self.publish_app_volumes()
-            elif command == "GET_SYSTEM_INFO":
-                if self.system_monitor:
-                    self.system_monitor.publish_system_status()
-            elif command == "SLEEP":
-                logger.info("Sleep command received - notifying ESP32")
-                self._publish_power_event("sleep_requested")
-            else:
-                logger.warning(f"Unknown command: {command}")
-                
-        except Exception as e:
-            logger.error(f"Error handling command '{command}': {e}")
-    
-    def handle_app_volume_command(self, payload):
-        """
-        Handle per-application volume commands
-        Format: {"app": "chrome.exe", "volume": 75}
-        """
-        try:
-            data = json.loads(payload)
-            app_name = data.get("app")
-            volume = data.get("volume")
-            
-            if app_name and volume is not None:
-                if self.volume_controller.set_app_volume(app_name, volume):
-                    logger.info(f"Set {app_name} volume to {volume}%")
-                    # Publish confirmation
-                    self.publish_app_volume_status(app_name, volume)
-                else:
-                    logger.warning(f"Failed to set volume for {app_name}")
-            else:
-                logger.warning(f"Invalid app volume command format: {payload}")
-                
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid JSON in app volume command: {payload}")
-        except Exception as e:
-            logger.error(f"Error handling app volume command: {e}")
-    
-    def publish_status(self, status):
-        """
-        Publish PC status to MQTT
-        
-        Args:
-            status (str): Status message
-        """
-        try:
-            volume = self.volume_controller.get_volume()
-            muted = self.volume_controller.is_muted()
-            
-            status_data = {
-                "status": status,
-                "volume": volume,
-                "muted": muted,
-                "client_id": self.client_id,
-                "timestamp": time.time()
-            }
-            
-            topic = self.topics.get("status")
-            if topic:
-                self.client.publish(topic, json.dumps(status_data), 
-                                  qos=self.qos, retain=self.retain)
-                logger.debug(f"Status published: {status_data}")
-        except Exception as e:
-            logger.error(f"Error publishing status: {e}")
-    
-    def publish_app_volumes(self):
-        """Publish all application volumes"""
-        try:
-            app_volumes = self.volume_controller.get_all_app_volumes()
-            if app_volumes:
-                payload = json.dumps(app_volumes)
-                topic = f"{self.topics.get('app_volume')}/status"
-                self.client.publish(topic, payload, qos=self.qos)
-                logger.debug(f"Published app volumes: {app_volumes}")
-        except Exception as e:
-            logger.error(f"Error publishing app volumes: {e}")
-    
-    def publish_app_volume_status(self, app_name, volume):
-        """Publish individual app volume status"""
-        try:
-            data = {"app": app_name, "volume": volume, "timestamp": time.time()}
-            topic = f"{self.topics.get('app_volume')}/status/{app_name}"
-            self.client.publish(topic, json.dumps(data), qos=self.qos)
-        except Exception as e:
-            logger.error(f"Error publishing app volume status: {e}")
-    
-    def publish_volume_change(self, volume):
-        """Publish volume change to ESP32"""
-        try:
-            topic = self.topics.get("pc_volume")
-            if topic:
-                self.client.publish(topic, str(volume), qos=self.qos)
-                logger.debug(f"Published volume change: {volume}%")
-        except Exception as e:
-            logger.error(f"Error publishing volume change: {e}")
-    
-    def _publish_power_event(self, event_type, details=None):
-        """Publish power event"""
-        try:
-            power_event = {
-                "event": event_type,
-                "timestamp": time.time()
-            }
-            if details:
-                power_event.update(details)
-            
-            topic = self.topics.get("pc_power")
-            if topic:
-                self.client.publish(topic, json.dumps(power_event), qos=self.qos)
-                logger.debug(f"Published power event: {power_event}")
-        except Exception as e:
-            logger.error(f"Error publishing power event: {e}")
-    
-    def _volume_sync_loop(self):
-        """Background thread for volume synchronization"""
-        logger.info("Volume sync loop started")
-        
-        while self.running:
-            try:
-                if self.connected:
-                    # Check for external volume changes
-                    new_volume = self.volume_controller.sync_volume_from_system()
-                    if new_volume is not None:
-                        # Publish volume change to ESP32
-                        self.publish_volume_change(new_volume)
-                        logger.info(f"Synced volume change to ESP32: {new_volume}%")
-                    
-                    # Refresh app list periodically (every 30 seconds)
-                    if int(time.time()) % 30 == 0:
-                        self.volume_controller.refresh_applications()
-                
-                time.sleep(self.sync_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in volume sync loop: {e}")
-                time.sleep(self.sync_interval)
-        
-        logger.info("Volume sync loop stopped")
-    
-    def _reconnect_loop(self):
-        """Background thread for automatic reconnection"""
-        while self.running and not self.connected:
-            try:
-                logger.info("Attempting to reconnect...")
-                if self.connect():
-                    break
-                time.sleep(self.reconnect_delay)
-            except Exception as e:
-                logger.error(f"Reconnection error: {e}")
-                time.sleep(self.reconnect_delay)
-    
-    def start(self):
-        """Start MQTT client with automatic reconnection"""
-        self.running = True
-        
-        try:
-            logger.info("Starting enhanced MQTT client...")
-            
-            # Start reconnection thread
-            self.reconnect_thread = threading.Thread(target=self._reconnect_loop, daemon=True)
-            self.reconnect_thread.start()
-            
-            # Start main loop
-            self.client.loop_forever()
-            
-        except KeyboardInterrupt:
-            logger.info("Shutting down...")
-            self.stop()
-        except Exception as e:
-            logger.error(f"Error in MQTT loop: {e}")
-        finally:
-            self.stop()
-    
-    def stop(self):
-        """Stop MQTT client and cleanup"""
-        try:
-            self.running = False
-            if self.connected:
-                self.publish_status("offline")
-                self.client.disconnect()
-            
-            # Wait for threads to finish
-            if self.sync_thread and self.sync_thread.is_alive():
-                self.sync_thread.join(timeout=2)
-            if self.reconnect_thread and self.reconnect_thread.is_alive():
-                self.reconnect_thread.join(timeout=2)
-            
-            logger.info("MQTT client stopped")
-        except Exception as e:
-            logger.error(f"Error stopping MQTT client: {e}")
-    
-    def set_system_monitor(self, system_monitor):
-        """Set system monitor reference"""
-        self.system_monitor = system_monitor
-    
-    def publish_system_status(self, system_data):
-        """Publish system status information"""
-        try:
-            topic = self.topics.get("pc_system")
-            if topic:
-                self.client.publish(topic, json.dumps(system_data), 
-                                  qos=self.qos, retain=self.retain)
-                logger.debug("System status published")
-        except Exception as e:
-            logger.error(f"Error publishing system status: {e}")
-    
-    def publish_power_event(self, event_type, details=None):
-        """Public method to publish power events"""
-        self._publish_power_event(event_type, details)
-    
-    def get_connection_status(self):
-        """Get current connection status"""
-        return {
-            "connected": self.connected,
-            "running": self.running,
-            "broker": self.broker,
-            "port": self.port,
-            "client_id": self.client_id
-        }
-    
-    def force_reconnect(self):
-        """Force a reconnection attempt"""
-        try:
-            if self.connected:
-                self.client.disconnect()
-            self.connect()
-        except Exception as e:
-            logger.error(f"Error forcing reconnect: {e}")
-    
-    def publish_diagnostic_info(self, diagnostic_data):
-        """Publish diagnostic information"""
-        try:
-            # Use system topic for diagnostics
-            topic = self.topics.get("pc_system")
-            if topic:
-                diagnostic_payload = {
-                    "type": "diagnostics",
-                    "data": diagnostic_data,
-                    "timestamp": time.time()
-                }
-                self.client.publish(f"{topic}/diagnostics", 
-                                  json.dumps(diagnostic_payload), qos=self.qos)
-                logger.debug("Diagnostic info published")
-        except Exception as e:
+"""
+MQTT client for volume control communication.
+"""
+
+import dataclasses
+import json
+import queue
+import socket
+import sys
+import time
+import functools
+import threading
+import logging
+import paho.mqtt.client as mqtt
+from .json_utils import _dumps, _loads
+
+logger = logging.getLogger(__name__)
+
+# Pending per-app status updates that trigger an immediate batch flush
+_APP_STATUS_BATCH_SIZE = 16
+
+# Seconds between application list refreshes in the sync loop
+_APP_REFRESH_INTERVAL = 30.0
+
+# Idle sync loop backoff: sync_interval doubles up to this many times, capped in seconds
+_IDLE_BACKOFF_STEPS = 4
+_IDLE_BACKOFF_MAX = 30.0
+
+# Serialized status payload prefixes kept for reuse
+_STATUS_CACHE_SIZE = 8
+
+# Unacknowledged QoS>0 publishes paho keeps in flight; an MQTTv5 broker's
+# Receive Maximum lowers this further on connect
+_MAX_INFLIGHT = 100
+
+# Incoming messages waiting for the worker thread; the oldest are dropped beyond this
+_MESSAGE_QUEUE_SIZE = 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class _AppVolumeStatus:
+    """Body of an application volume status message"""
+    __slots__ = ("app", "volume", "timestamp")
+    app: str
+    volume: int
+    timestamp: float
+
+
+@dataclasses.dataclass(frozen=True)
+class _DiagnosticPayload:
+    """Body of a diagnostics message"""
+    __slots__ = ("type", "data", "timestamp")
+    type: str
+    data: dict
+    timestamp: float
+
+
+def _intern_topic(topic):
+    """Intern a topic string so dispatch lookups can match on identity"""
+    return sys.intern(topic) if topic else topic
+
+
+class MQTTVolumeClient:
+    """Enhanced MQTT client with bidirectional sync and per-app control"""
+    
+    def __init__(self, volume_controller, config_manager):
+        """
+        Initialize MQTT client
+        
+        Args:
+            volume_controller: Volume controller instance
+            config_manager: Configuration manager instance
+        """
+        self.volume_controller = volume_controller
+        self.config_manager = config_manager
+        self.connected = False
+        self.sync_thread = None
+        self._message_queue = queue.Queue(maxsize=_MESSAGE_QUEUE_SIZE)
+        # Set while stopped; start() clears it and stop() sets it
+        self._stop_event = threading.Event()
+        self._stop_event.set()
+        self.system_monitor = None
+        
+        # Get configuration
+        mqtt_config = config_manager.get_mqtt_config()
+        self.topics = config_manager.get_topics()
+        settings = config_manager.get_settings()
+        
+        # Topic strings resolved once for the publish and dispatch paths
+        topics = self.topics
+        app_volume_topic = topics.get("app_volume")
+        self._topic_volume = _intern_topic(topics.get("volume"))
+        self._topic_command = _intern_topic(topics.get("command"))
+        self._topic_status = topics.get("status")
+        self._topic_app_volume = _intern_topic(app_volume_topic)
+        self._topic_app_volume_status = f"{app_volume_topic}/status"
+        self._topic_app_volume_status_prefix = f"{app_volume_topic}/status/"
+        self._topic_app_volume_batch = f"{app_volume_topic}/status/batch"
+        self._topic_pc_volume = topics.get("pc_volume")
+        self._topic_pc_power = topics.get("pc_power")
+        self._topic_pc_system = topics.get("pc_system")
+        self._topic_pc_system_diag = f"{self._topic_pc_system}/diagnostics"
+        
+        self.broker = mqtt_config.get("broker")
+        self.port = mqtt_config.get("port", 1883)
+        self.username = mqtt_config.get("username", "")
+        self.password = mqtt_config.get("password", "")
+        self.client_id = mqtt_config.get("client_id", "PCVolumeControl")
+        self.keepalive = mqtt_config.get("keepalive", 60)
+        self.qos = mqtt_config.get("qos", 1)
+        # Periodic state is last-writer-wins, so it skips the PUBACK round-trip
+        self.telemetry_qos = mqtt_config.get("telemetry_qos", 0)
+        self.retain = mqtt_config.get("retain", True)
+        self.protocol = mqtt_config.get("protocol", "MQTTv311")
+        
+        self.sync_interval = settings.get("sync_interval", 2.0)
+        self.reconnect_delay = settings.get("reconnect_delay", 5.0)
+        
+        # Command name -> handler, built once for handle_command()
+        self._command_handlers = {
+            "MUTE": volume_controller.mute,
+            "UNMUTE": volume_controller.unmute,
+            "STATUS": functools.partial(self.publish_status, "online"),
+            "GETVOLUME": self._cmd_get_volume,
+            "REFRESH_APPS": self._cmd_refresh_apps,
+            "GET_APP_VOLUMES": self.publish_app_volumes,
+            "GET_SYSTEM_INFO": self._cmd_get_system_info,
+            "SLEEP": self._cmd_sleep
+        }
+        
+        # Subscribed topic -> handler taking the raw payload, for _dispatch_message()
+        self._topic_handlers = {
+            topic: handler for topic, handler in (
+                (self._topic_volume, self._handle_volume_message),
+                (self._topic_command, self._handle_command_message),
+                (self._topic_app_volume, self.handle_app_volume_command)
+            ) if topic
+        }
+        
+        # Per-app status updates are coalesced for this long (0 = publish immediately)
+        self.app_volume_linger = settings.get("app_volume_linger_ms", 0) / 1000.0
+        self._app_status_pending = []
+        self._app_status_lock = threading.Lock()
+        self._app_status_timer = None
+        
+        # (status, volume, muted) -> status payload up to the timestamp value
+        self._status_cache = {}
+        
+        # Last values sent, so unchanged state isn't published again
+        self._last_published_volume = None
+        self._last_published_app_volumes = {}
+        
+        # Initialize MQTT client
+        self.client = mqtt.Client(client_id=self.client_id,
+                                  protocol=getattr(mqtt, self.protocol, mqtt.MQTTv311))
+        
+        # Pipeline publishes instead of waiting for each PUBACK, and never
+        # drop queued messages; costs memory only if the broker stalls
+        self.client.max_inflight_messages_set(_MAX_INFLIGHT)
+        self.client.max_queued_messages_set(0)
+        
+        # Set callbacks
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.on_message = self.on_message
+        
+        # Let paho's network thread handle reconnection with backoff
+        self.client.reconnect_delay_set(min_delay=1, max_delay=self.reconnect_delay)
+        
+        # Set authentication if provided
+        if self.username and self.password:
+            self.client.username_pw_set(self.username, self.password)
+        
+        # Set will message for clean disconnection
+        will_payload = _dumps({"status": "offline", "client_id": self.client_id})
+        self.client.will_set(self._topic_status, will_payload, retain=self.retain)
+        
+        # Reused by stop() so shutdown doesn't have to query the volume controller
+        self._offline_payload = will_payload
+        
+        logger.info(f"MQTT client initialized for broker {self.broker}:{self.port}")
+    
+    @property
+    def running(self):
+        """Whether the client has been started and not yet stopped"""
+        return not self._stop_event.is_set()
+    
+    @running.setter
+    def running(self, value):
+        if value:
+            self._stop_event.clear()
+        else:
+            self._stop_event.set()
+    
+    def connect(self):
+        """
+        Connect to MQTT broker
+        
+        The connection is made by paho's network thread once the loop is
+        running, which also retries it until it succeeds.
+        """
+        try:
+            if not self.broker or self.broker == "192.168.1.xxx":
+                logger.error("MQTT broker not configured")
+                return False
+                
+            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
+            self.client.connect_async(self.broker, self.port, self.keepalive)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to connect to MQTT broker: {e}")
+            return False
+    
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        """Callback for when client connects to broker"""
+        if rc == 0:
+            self.connected = True
+            logger.info("Connected to MQTT broker successfully")
+            
+            self._tune_socket()
+            
+            # Never exceed the in-flight limit an MQTTv5 broker announces
+            receive_maximum = getattr(properties, "ReceiveMaximum", None)
+            self.client.max_inflight_messages_set(min(_MAX_INFLIGHT, receive_maximum or _MAX_INFLIGHT))
+            
+            # Republish current state after a reconnect
+            self._last_published_volume = None
+            self._last_published_app_volumes.clear()
+            if self.system_monitor:
+                # The broker may have missed earlier snapshots; start over with a full one
+                self.system_monitor.reset_published_status()
+            
+            # Subscribe to topics
+            topics_to_subscribe = [
+                self._topic_volume,
+                self._topic_command,
+                self._topic_app_volume
+            ]
+            
+            for topic in topics_to_subscribe:
+                if topic:
+                    client.subscribe(topic, self.qos)
+                    logger.info(f"Subscribed to {topic}")
+            
+            # Publish online status
+            self.publish_status("online")
+            
+            # Start volume sync thread, which also handles incoming messages
+            if not self.sync_thread or not self.sync_thread.is_alive():
+                self.sync_thread = threading.Thread(target=self._volume_sync_loop, daemon=True)
+                self.sync_thread.start()
+                logger.info("Volume sync thread started")
+            
+        else:
+            logger.error(f"Connection failed with code {rc}")
+            self.connected = False
+    
+    def _tune_socket(self):
+        """Disable Nagle's algorithm so small MQTT packets are sent immediately"""
+        try:
+            sock = self.client.socket()
+            if sock is None:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 18)
+        except (OSError, AttributeError) as e:
+            logger.debug("Could not tune MQTT socket: %s", e)
+    
+    def on_disconnect(self, client, userdata, rc, properties=None):
+        """Callback for when client disconnects from broker"""
+        self.connected = False
+        if rc != 0:
+            logger.warning(f"Unexpected disconnection (code: {rc}), attempting to reconnect...")
+        else:
+            logger.info("Disconnected from MQTT broker")
+    
+    def on_message(self, client, userdata, msg):
+        """
+        Callback for when a message is received
+        
+        Runs on paho's network thread, so the message is only queued here and
+        handled by _volume_sync_loop(); volume changes can block on COM calls.
+        
+        Args:
+            client: MQTT client instance
+            userdata: User data
+            msg: MQTT message
+        """
+        item = (msg.topic, msg.payload)
+        try:
+            self._message_queue.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest message; newer volume commands supersede it
+            try:
+                self._message_queue.get_nowait()
+            except queue.Empty:
+                pass
+            logger.warning("Message queue full, dropping oldest message")
+            try:
+                self._message_queue.put_nowait(item)
+            except queue.Full:
+                pass
+    
+    def _dispatch_message(self, topic, payload):
+        """
+        Route a received message to its handler
+        
+        Args:
+            topic (str): Topic the message arrived on
+            payload (bytes): Raw message payload
+        """
+        try:
+            # Raw bytes: int() and the JSON parser accept them directly
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received message on %s: %s", topic, payload.decode('utf-8', 'replace'))
+            
+            handler = self._topic_handlers.get(topic)
+            if handler:
+                handler(payload)
+        
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+    
+    def _handle_volume_message(self, payload):
+        """Handle volume control messages"""
+        try:
+            volume_level = int(payload)
+            if self.volume_controller.set_volume(volume_level):
+                # The ESP32 already shows this level; a later local change
+                # back to the previously published value must still go out
+                self._last_published_volume = volume_level
+                logger.info(f"Volume set to {volume_level}%")
+        except ValueError:
+            logger.warning(f"Invalid volume value: {payload!r}")
+        except Exception as e:
+            logger.error(f"Error handling volume message: {e}")
+    
+    def _handle_command_message(self, payload):
+        """Handle a raw command topic payload"""
+        self.handle_command(payload.decode('utf-8'))
+    
+    def handle_command(self, command):
+        """
+        Handle special commands
+        
+        Args:
+            command (str): Command string
+        """
+        try:
+            # Commands normally arrive upper-case; only fold case when they don't
+            handler = self._command_handlers.get(command)
+            if handler is None:
+                command = command.upper()
+                handler = self._command_handlers.get(command)
+            if handler:
+                handler()
+            else:
+                logger.warning(f"Unknown command: {command}")
+                
+        except Exception as e:
+            logger.error(f"Error handling command '{command}': {e}")
+    
+    def _cmd_get_volume(self):
+        """Publish the current system volume on the volume topic"""
+        if not self.connected:
+            return
+        vol = self.volume_controller.get_volume()
+        self.client.publish(self._topic_volume, str(vol), qos=self.qos)
+        logger.info(f"Published current volume: {vol}%")
+    
+    def _cmd_refresh_apps(self):
+        """Rescan audio applications and publish their volumes"""
+        self.volume_controller.refresh_applications()
+        self.publish_app_volumes()
+    
+    def _cmd_get_system_info(self):
+        """Publish system status if a system monitor is attached"""
+        if self.system_monitor:
+            self.system_monitor.publish_system_status(force_full=True)
+    
+    def _cmd_sleep(self):
+        """Notify the ESP32 that a sleep was requested"""
+        logger.info("Sleep command received - notifying ESP32")
+        self._publish_power_event("sleep_requested")
+    
+    def handle_app_volume_command(self, payload):
+        """
+        Handle per-application volume commands
+        Format: {"app": "chrome.exe", "volume": 75}
+        or a list of such objects to change several applications at once
+        
+        Args:
+            payload (bytes | str): JSON message payload
+        """
+        try:
+            data = _loads(payload)
+            commands = data if isinstance(data, list) else [data]
+            updates = []
+            
+            for command in commands:
+                app_name = command.get("app") if isinstance(command, dict) else None
+                volume = command.get("volume") if isinstance(command, dict) else None
+                
+                if app_name and volume is not None:
+                    if self.volume_controller.set_app_volume(app_name, volume):
+                        logger.info(f"Set {app_name} volume to {volume}%")
+                        # Always confirm a command, even if it repeats the last status
+                        self._last_published_app_volumes.pop(app_name, None)
+                        updates.append((app_name, volume))
+                    else:
+                        logger.warning(f"Failed to set volume for {app_name}")
+                else:
+                    logger.warning(f"Invalid app volume command format: {payload!r}")
+            
+            # Publish confirmation
+            if len(updates) == 1:
+                self.publish_app_volume_status(*updates[0])
+            elif updates:
+                self.publish_app_volume_status_batch(updates)
+                
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in app volume command: {payload!r}")
+        except Exception as e:
+            logger.error(f"Error handling app volume command: {e}")
+    
+    def publish_status(self, status, timestamp=None):
+        """
+        Publish PC status to MQTT
+        
+        Args:
+            status (str): Status message
+            timestamp (float): Event time; defaults to now
+        """
+        if not self.connected:
+            return
+        try:
+            volume = self.volume_controller.get_volume()
+            muted = self.volume_controller.is_muted()
+            
+            topic = self._topic_status
+            if topic:
+                payload = self._status_prefix(status, volume, muted) + repr(timestamp or time.time()) + "}"
+                self.client.publish(topic, payload, 
+                                  qos=self.qos, retain=self.retain)
+                logger.debug("Status published: %s", payload)
+        except Exception as e:
+            logger.error(f"Error publishing status: {e}")
+    
+    def _status_prefix(self, status, volume, muted):
+        """
+        Return the serialized status payload up to its timestamp value
+        
+        Back-to-back status messages usually repeat the same state, so the
+        JSON for everything but the timestamp is cached per state.
+        """
+        key = (status, volume, muted)
+        prefix = self._status_cache.get(key)
+        if prefix is None:
+            body = _dumps({
+                "status": status,
+                "volume": volume,
+                "muted": muted,
+                "client_id": self.client_id
+            })
+            prefix = body[:-1] + ',"timestamp":'
+            if len(self._status_cache) >= _STATUS_CACHE_SIZE:
+                # Evict the oldest entry
+                del self._status_cache[next(iter(self._status_cache))]
+            self._status_cache[key] = prefix
+        return prefix
+    
+    def publish_app_volumes(self):
+        """Publish all application volumes"""
+        if not self.connected:
+            return
+        try:
+            app_volumes = self.volume_controller.get_all_app_volumes()
+            if app_volumes:
+                payload = _dumps(app_volumes)
+                topic = self._topic_app_volume_status
+                self.client.publish(topic, payload, qos=self.telemetry_qos)
+                logger.debug("Published app volumes: %s", app_volumes)
+        except Exception as e:
+            logger.error(f"Error publishing app volumes: {e}")
+    
+    def publish_app_volume_status(self, app_name, volume, timestamp=None):
+        """
+        Publish individual app volume status
+        
+        When app_volume_linger_ms is set, updates are held briefly and
+        published together by publish_app_volume_status_batch(), which
+        stamps the whole batch with one time. Updates that repeat the last
+        published volume for the application are skipped.
+        """
+        if not self.connected or self._last_published_app_volumes.get(app_name) == volume:
+            return
+        self._last_published_app_volumes[app_name] = volume
+        
+        if self.app_volume_linger > 0:
+            self._queue_app_volume_status(app_name, volume)
+        else:
+            self._publish_app_volume_status(app_name, volume, timestamp)
+    
+    def _publish_app_volume_status(self, app_name, volume, timestamp=None):
+        """Publish one app volume status on its per-app topic"""
+        if not self.connected:
+            return
+        try:
+            data = _AppVolumeStatus(app_name, volume, timestamp or time.time())
+            topic = f"{self._topic_app_volume_status_prefix}{app_name}"
+            self.client.publish(topic, _dumps(data), qos=self.qos)
+        except Exception as e:
+            logger.error(f"Error publishing app volume status: {e}")
+    
+    def publish_app_volume_status_batch(self, updates, timestamp=None):
+        """
+        Publish several app volume statuses in one message
+        
+        Args:
+            updates (list): (app_name, volume) tuples
+            timestamp (float): Time stamped on every entry; defaults to now
+        """
+        if not self.connected:
+            return
+        try:
+            timestamp = timestamp or time.time()
+            data = [_AppVolumeStatus(app_name, volume, timestamp)
+                    for app_name, volume in updates]
+            topic = self._topic_app_volume_batch
+            self.client.publish(topic, _dumps(data), qos=self.qos)
+            logger.debug("Published %d app volume updates", len(data))
+        except Exception as e:
+            logger.error(f"Error publishing app volume batch: {e}")
+    
+    def _queue_app_volume_status(self, app_name, volume):
+        """Add an app volume update to the pending batch"""
+        batch = None
+        with self._app_status_lock:
+            self._app_status_pending.append((app_name, volume))
+            if len(self._app_status_pending) >= _APP_STATUS_BATCH_SIZE:
+                batch = self._take_pending_app_status()
+            elif self._app_status_timer is None:
+                self._app_status_timer = threading.Timer(self.app_volume_linger, self._flush_app_volume_status)
+                self._app_status_timer.daemon = True
+                self._app_status_timer.start()
+        
+        if batch:
+            self.publish_app_volume_status_batch(batch)
+    
+    def _take_pending_app_status(self):
+        """Detach the pending updates and cancel the linger timer (lock held)"""
+        batch = self._app_status_pending
+        self._app_status_pending = []
+        if self._app_status_timer:
+            self._app_status_timer.cancel()
+            self._app_status_timer = None
+        return batch
+    
+    def _flush_app_volume_status(self):
+        """Publish whatever app volume updates are pending"""
+        with self._app_status_lock:
+            batch = self._take_pending_app_status()
+        
+        if len(batch) == 1:
+            # A lone update keeps the per-app topic and payload
+            self._publish_app_volume_status(*batch[0])
+        elif batch:
+            self.publish_app_volume_status_batch(batch)
+    
+    def publish_volume_change(self, volume, force=False):
+        """
+        Publish volume change to ESP32, skipping repeats of the last value
+        
+        Args:
+            volume (int): Volume level
+            force (bool): Publish even if the value repeats, e.g. to resync the ESP32
+        """
+        if not self.connected or (not force and volume == self._last_published_volume):
+            return
+        try:
+            topic = self._topic_pc_volume
+            if topic:
+                self.client.publish(topic, str(volume), qos=self.telemetry_qos)
+                self._last_published_volume = volume
+                logger.debug("Published volume change: %s%%", volume)
+        except Exception as e:
+            logger.error(f"Error publishing volume change: {e}")
+    
+    def _publish_power_event(self, event_type, details=None, timestamp=None):
+        """Publish power event"""
+        if not self.connected:
+            return
+        try:
+            power_event = {
+                "event": event_type,
+                "timestamp": timestamp or time.time()
+            }
+            if details:
+                power_event.update(details)
+            
+            topic = self._topic_pc_power
+            if topic:
+                self.client.publish(topic, _dumps(power_event), qos=self.qos)
+                logger.debug("Published power event: %s", power_event)
+        except Exception as e:
+            logger.error(f"Error publishing power event: {e}")
+    
+    def _volume_sync_loop(self):
+        """
+        Background thread for volume synchronization
+        
+        The same thread handles the messages queued by on_message(), waiting
+        on the queue between polls, so commands and the periodic sync share
+        one thread instead of handing work between two.
+        """
+        logger.info("Volume sync loop started")
+        
+        now = time.monotonic()
+        next_sync = now
+        # Refresh app list periodically (every 30 seconds)
+        next_refresh = now + _APP_REFRESH_INTERVAL
+        # Consecutive polls without a volume change, used to back off
+        idle_count = 0
+        
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            try:
+                if now >= next_sync:
+                    if self.connected:
+                        # Check for external volume changes
+                        new_volume = self.volume_controller.sync_volume_from_system()
+                        if new_volume is not None:
+                            idle_count = 0
+                            # Publish volume change to ESP32
+                            self.publish_volume_change(new_volume)
+                            logger.info(f"Synced volume change to ESP32: {new_volume}%")
+                        else:
+                            idle_count += 1
+                    
+                    next_sync = now + min(self.sync_interval * (2 ** min(idle_count, _IDLE_BACKOFF_STEPS)),
+                                          _IDLE_BACKOFF_MAX)
+                
+                if now >= next_refresh:
+                    next_refresh = now + _APP_REFRESH_INTERVAL
+                    if self.connected:
+                        self.volume_controller.refresh_applications()
+                
+            except Exception as e:
+                logger.error(f"Error in volume sync loop: {e}")
+                next_sync = now + self.sync_interval
+            
+            # Handle messages until the next poll or refresh is due
+            timeout = min(next_sync, next_refresh) - time.monotonic()
+            try:
+                item = self._message_queue.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            
+            topic, payload = item
+            self._dispatch_message(topic, payload)
+            if topic == self._topic_volume:
+                # Volume activity: return to the normal poll interval
+                idle_count = 0
+                next_sync = min(next_sync, time.monotonic() + self.sync_interval)
+        
+        logger.info("Volume sync loop stopped")
+    
+    def start(self):
+        """
+        Start MQTT client with automatic reconnection
+        
+        Blocks until stop() is called; the network loop itself runs on
+        paho's own thread.
+        """
+        self._stop_event.clear()
+        
+        # Drop anything left from a previous run, including stop()'s sentinel
+        while True:
+            try:
+                self._message_queue.get_nowait()
+            except queue.Empty:
+                break
+        
+        try:
+            logger.info("Starting enhanced MQTT client...")
+            
+            if not self.connect():
+                return
+            
+            # Start paho's network thread, which connects and reconnects
+            self.client.loop_start()
+            self._stop_event.wait()
+            
+        except KeyboardInterrupt:
+            logger.info("Shutting down...")
+        except Exception as e:
+            logger.error(f"Error in MQTT loop: {e}")
+        finally:
+            # Leave the client stopped however the loop ended, unless
+            # stop() already ran
+            if not self._stop_event.is_set():
+                self.stop()
+    
+    def stop(self, stop_fast=True):
+        """
+        Stop MQTT client and cleanup
+        
+        Args:
+            stop_fast (bool): Publish the cached offline payload instead of a
+                full status with the current volume and mute state
+        """
+        try:
+            self._stop_event.set()
+            if self.sync_thread and self.sync_thread.is_alive():
+                # Wake the sync loop out of its wait on the message queue;
+                # a full queue already keeps it from waiting
+                try:
+                    self._message_queue.put_nowait(None)
+                except queue.Full:
+                    pass
+            if self.connected:
+                self._flush_app_volume_status()
+                if stop_fast:
+                    self.client.publish(self._topic_status, self._offline_payload,
+                                        qos=self.qos, retain=self.retain)
+                else:
+                    self.publish_status("offline")
+                self.client.disconnect()
+            self.client.loop_stop()
+            
+            # Wait for threads to finish
+            if self.sync_thread and self.sync_thread.is_alive():
+                self.sync_thread.join(timeout=2)
+            
+            logger.info("MQTT client stopped")
+        except Exception as e:
+            logger.error(f"Error stopping MQTT client: {e}")
+    
+    def set_system_monitor(self, system_monitor):
+        """Set system monitor reference"""
+        self.system_monitor = system_monitor
+    
+    def publish_system_status(self, system_data, retain=None):
+        """
+        Publish system status information
+        
+        Args:
+            system_data (dict | str): Status fields, or an already serialized
+                JSON payload
+            retain (bool): Override the configured retain flag
+        
+        Returns:
+            bool: True if the message was handed to the client for sending
+        """
+        if not self.connected:
+            return False
+        try:
+            topic = self._topic_pc_system
+            if not topic:
+                return False
+            payload = system_data if isinstance(system_data, str) else _dumps(system_data)
+            info = self.client.publish(topic, payload, 
+                                       qos=self.telemetry_qos,
+                                       retain=self.retain if retain is None else retain)
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.debug(f"System status not published (rc={info.rc})")
+                return False
+            logger.debug("System status published")
+            return True
+        except Exception as e:
+            logger.error(f"Error publishing system status: {e}")
+            return False
+    
+    def publish_power_event(self, event_type, details=None, timestamp=None):
+        """Public method to publish power events"""
+        self._publish_power_event(event_type, details, timestamp)
+    
+    def get_connection_status(self):
+        """Get current connection status"""
+        return {
+            "connected": self.connected,
+            "running": self.running,
+            "broker": self.broker,
+            "port": self.port,
+            "client_id": self.client_id
+        }
+    
+    def force_reconnect(self):
+        """
+        Force a reconnection attempt
+        
+        Only the socket is shut down here; paho's network thread sees the
+        connection drop and reconnects on its own, so this thread never
+        competes with it for the socket.
+        """
+        try:
+            sock = self.client.socket()
+            if sock is None:
+                # Not connected; the network thread is already retrying
+                logger.info("MQTT client not connected, reconnect already pending")
+                return
+            sock.shutdown(socket.SHUT_RDWR)
+        except Exception as e:
+            logger.error(f"Error forcing reconnect: {e}")
+    
+    def publish_diagnostic_info(self, diagnostic_data, timestamp=None):
+        """Publish diagnostic information"""
+        if not self.connected:
+            return
+        try:
+            # Use system topic for diagnostics
+            if self._topic_pc_system:
+                diagnostic_payload = _DiagnosticPayload("diagnostics", diagnostic_data,
+                                                        timestamp or time.time())
+                self.client.publish(self._topic_pc_system_diag, 
+                                  _dumps(diagnostic_payload), qos=self.telemetry_qos)
+                logger.debug("Diagnostic info published")
+        except Exception as e:
             logger.error(f"Error publishing diagnostic info: {e}")
\ No newline at end of file
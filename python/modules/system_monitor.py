@@ -1,377 +1,959 @@
-"""
-PC system monitoring for power events and system status.
-"""
-
-import time
-import threading
-import logging
-import psutil
-from .constants import WINDOWS_MONITORING
-
-# Optional Windows-specific imports
-if WINDOWS_MONITORING:
-    try:
-        import wmi
-    except ImportError:
-        WINDOWS_MONITORING = False
-
-logger = logging.getLogger(__name__)
-
-
-class PCSystemMonitor:
-    """Monitor PC system events and status"""
-    
-    def __init__(self, mqtt_client, config_manager):
-        """
-        Initialize system monitor
-        
-        Args:
-            mqtt_client: MQTT client instance
-            config_manager: Configuration manager instance
-        """
-        self.mqtt_client = mqtt_client
-        self.config_manager = config_manager
-        self.monitoring = False
-        self.monitor_thread = None
-        self.last_power_state = "unknown"
-        self.system_info = {}
-        self.last_activity_time = time.time()
-        self.sleep_start_time = None
-        
-        # Get configuration
-        settings = config_manager.get_settings()
-        power_config = config_manager.get("power_management", {})
-        
-        self.monitor_interval = settings.get("monitor_interval", 5)
-        self.status_publish_interval = settings.get("status_publish_interval", 60)
-        self.detect_sleep_wake = power_config.get("detect_sleep_wake", True)
-        self.idle_threshold_minutes = power_config.get("idle_threshold_minutes", 30)
-        self.sleep_detection_method = power_config.get("sleep_detection_method", "activity")
-        
-        # Initialize WMI if available
-        if WINDOWS_MONITORING and self.sleep_detection_method == "wmi":
-            try:
-                self.wmi = wmi.WMI()
-                self._get_system_info()
-                logger.info("PC system monitor initialized with WMI support")
-            except Exception as e:
-                logger.error(f"Failed to initialize WMI: {e}")
-                self.wmi = None
-                self.sleep_detection_method = "activity"
-        else:
-            self.wmi = None
-            if not WINDOWS_MONITORING:
-                logger.warning("Windows monitoring libraries not available")
-        
-        # Get initial system info
-        self._get_system_info()
-        logger.info(f"PC system monitor initialized (method: {self.sleep_detection_method})")
-    
-    def _get_system_info(self):
-        """Get system information"""
-        try:
-            # Basic system info using psutil
-            self.system_info = {
-                "platform": "Windows",
-                "boot_time": psutil.boot_time(),
-                "cpu_count": psutil.cpu_count(),
-                "cpu_count_logical": psutil.cpu_count(logical=True)
-            }
-            
-            # Enhanced info with WMI if available
-            if self.wmi:
-                try:
-                    # Get computer system info
-                    for computer in self.wmi.Win32_ComputerSystem():
-                        self.system_info.update({
-                            "computer_name": computer.Name,
-                            "manufacturer": computer.Manufacturer,
-                            "model": computer.Model,
-                            "total_memory": int(computer.TotalPhysicalMemory) if computer.TotalPhysicalMemory else 0
-                        })
-                    
-                    # Get OS info
-                    for os_info in self.wmi.Win32_OperatingSystem():
-                        self.system_info.update({
-                            "os_name": os_info.Caption,
-                            "os_version": os_info.Version,
-                            "os_architecture": os_info.OSArchitecture
-                        })
-                    
-                    # Get CPU info
-                    for processor in self.wmi.Win32_Processor():
-                        self.system_info.update({
-                            "cpu_name": processor.Name,
-                            "cpu_cores": processor.NumberOfCores,
-                            "cpu_threads": processor.NumberOfLogicalProcessors
-                        })
-                        break  # Just get first processor
-                        
-                except Exception as e:
-                    logger.warning(f"Error getting WMI system info: {e}")
-            
-            logger.debug(f"System info collected: {self.system_info}")
-            
-        except Exception as e:
-            logger.error(f"Error getting system info: {e}")
-    
-    def get_power_state(self):
-        """Get current power state"""
-        try:
-            if self.sleep_detection_method == "wmi" and self.wmi:
-                return self._get_power_state_wmi()
-            else:
-                return self._get_power_state_activity()
-                
-        except Exception as e:
-            logger.error(f"Error getting power state: {e}")
-            return "unknown"
-    
-    def _get_power_state_activity(self):
-        """Get power state based on system activity"""
-        try:
-            # Get CPU usage and memory info
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            # Check idle time
-            current_time = time.time()
-            idle_minutes = (current_time - self.last_activity_time) / 60
-            
-            # Determine power state based on activity
-            if idle_minutes > self.idle_threshold_minutes:
-                return "idle"
-            elif cpu_percent < 5 and memory.percent < 50:
-                return "low_activity"
-            elif cpu_percent > 80:
-                return "active_high"
-            else:
-                return "active"
-                
-        except Exception as e:
-            logger.error(f"Error getting activity-based power state: {e}")
-            return "unknown"
-    
-    def _get_power_state_wmi(self):
-        """Get power state using WMI (more accurate but Windows-specific)"""
-        try:
-            # This is a placeholder for more sophisticated WMI-based detection
-            # In practice, you'd query Win32_PowerManagementEvent or similar
-            return self._get_power_state_activity()
-        except Exception as e:
-            logger.error(f"Error getting WMI power state: {e}")
-            return "unknown"
-    
-    def publish_system_status(self):
-        """Publish comprehensive system status"""
-        try:
-            # Get current system metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            # Get disk usage (try C: drive first, fallback to root)
-            try:
-                disk = psutil.disk_usage('C:')
-            except Exception:
-                disk = psutil.disk_usage('/')
-            
-            # Get network info
-            network = psutil.net_io_counters()
-            
-            # Get process count
-            process_count = len(psutil.pids())
-            
-            # Get uptime
-            boot_time = psutil.boot_time()
-            uptime_seconds = time.time() - boot_time
-            
-            status_data = {
-                "timestamp": time.time(),
-                "power_state": self.get_power_state(),
-                "uptime_seconds": uptime_seconds,
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_available_gb": memory.available / (1024**3),
-                "memory_total_gb": memory.total / (1024**3),
-                "disk_percent": disk.percent,
-                "disk_free_gb": disk.free / (1024**3),
-                "disk_total_gb": disk.total / (1024**3),
-                "process_count": process_count,
-                "network_bytes_sent": network.bytes_sent,
-                "network_bytes_recv": network.bytes_recv,
-                "system_info": self.system_info,
-                "monitoring_config": {
-                    "detection_method": self.sleep_detection_method,
-                    "idle_threshold_minutes": self.idle_threshold_minutes,
-                    "monitor_interval": self.monitor_interval
-                }
-            }
-            
-            # Publish through MQTT client
-            self.mqtt_client.publish_system_status(status_data)
-            logger.debug("System status published")
-            
-        except Exception as e:
-            logger.error(f"Error publishing system status: {e}")
-    
-    def detect_power_events(self):
-        """Enhanced sleep/wake event detection"""
-        try:
-            if not self.detect_sleep_wake:
-                return
-                
-            current_state = self.get_power_state()
-            
-            if current_state != self.last_power_state:
-                logger.info(f"Power state changed: {self.last_power_state} -> {current_state}")
-                
-                # Publish power event
-                power_event = {
-                    "event": "state_change",
-                    "from_state": self.last_power_state,
-                    "to_state": current_state,
-                    "timestamp": time.time(),
-                    "system_uptime": time.time() - psutil.boot_time(),
-                    "detection_method": self.sleep_detection_method
-                }
-                
-                self.mqtt_client.publish_power_event("state_change", power_event)
-                
-                # Special handling for sleep events
-                if current_state in ["sleep", "hibernate", "idle"] and self.last_power_state in ["active", "active_high", "low_activity"]:
-                    logger.info("System entering sleep/idle state - notifying ESP32")
-                    self.sleep_start_time = time.time()
-                    
-                    sleep_event = {
-                        "event": "sleep_detected",
-                        "sleep_type": current_state,
-                        "timestamp": time.time(),
-                        "last_activity": self._get_last_activity_time(),
-                        "idle_duration": (time.time() - self.last_activity_time) / 60
-                    }
-                    self.mqtt_client.publish_power_event("sleep_detected", sleep_event)
-                
-                # Special handling for wake events
-                if self.last_power_state in ["sleep", "hibernate", "idle"] and current_state in ["active", "active_high", "low_activity"]:
-                    logger.info("System wake detected - notifying ESP32")
-                    
-                    wake_event = {
-                        "event": "wake_detected",
-                        "wake_source": "user_activity",
-                        "timestamp": time.time(),
-                        "sleep_duration": self._calculate_sleep_duration()
-                    }
-                    self.mqtt_client.publish_power_event("wake_detected", wake_event)
-                    
-                    # Update activity time
-                    self.last_activity_time = time.time()
-                    
-                    # Refresh applications after wake
-                    if hasattr(self.mqtt_client, 'volume_controller'):
-                        self.mqtt_client.volume_controller.refresh_applications()
-                        # Publish current volume state
-                        vol = self.mqtt_client.volume_controller.get_volume()
-                        self.mqtt_client.publish_volume_change(vol)
-                    
-                    # Publish updated system status
-                    self.publish_system_status()
-                
-                self.last_power_state = current_state
-                
-        except Exception as e:
-            logger.error(f"Error detecting power events: {e}")
-    
-    def _get_last_activity_time(self):
-        """Get timestamp of last user activity"""
-        try:
-            # For now, return the stored last activity time
-            # In a more sophisticated implementation, we could check:
-            # - Last mouse/keyboard input
-            # - Last file system activity
-            # - Network activity patterns
-            return self.last_activity_time
-        except Exception as e:
-            logger.error(f"Error getting last activity time: {e}")
-            return time.time()
-    
-    def _calculate_sleep_duration(self):
-        """Calculate how long the system was asleep"""
-        try:
-            if self.sleep_start_time:
-                duration = time.time() - self.sleep_start_time
-                self.sleep_start_time = None
-                return duration
-            else:
-                # Fallback calculation based on uptime vs expected uptime
-                return 0
-        except Exception as e:
-            logger.error(f"Error calculating sleep duration: {e}")
-            return 0
-    
-    def update_activity_time(self):
-        """Update the last activity time (can be called externally)"""
-        self.last_activity_time = time.time()
-    
-    def start_monitoring(self):
-        """Start system monitoring"""
-        if not self.monitoring:
-            self.monitoring = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
-            logger.info("System monitoring started")
-        else:
-            logger.warning("System monitoring already running")
-    
-    def stop_monitoring(self):
-        """Stop system monitoring"""
-        if self.monitoring:
-            self.monitoring = False
-            if self.monitor_thread and self.monitor_thread.is_alive():
-                self.monitor_thread.join(timeout=5)
-            logger.info("System monitoring stopped")
-        else:
-            logger.warning("System monitoring not running")
-    
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        last_status_publish = 0
-        
-        while self.monitoring:
-            try:
-                current_time = time.time()
-                
-                # Detect power events
-                self.detect_power_events()
-                
-                # Publish system status periodically
-                if current_time - last_status_publish >= self.status_publish_interval:
-                    self.publish_system_status()
-                    last_status_publish = current_time
-                
-                time.sleep(self.monitor_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}")
-                time.sleep(self.monitor_interval)
-        
-        logger.info("System monitor loop ended")
-    
-    def get_system_metrics(self):
-        """Get current system metrics"""
-        try:
-            return {
-                "cpu_percent": psutil.cpu_percent(interval=1),
-                "memory": psutil.virtual_memory()._asdict(),
-                "disk": psutil.disk_usage('C:' if psutil.WINDOWS else '/')._asdict(),
-                "network": psutil.net_io_counters()._asdict(),
-                "boot_time": psutil.boot_time(),
-                "process_count": len(psutil.pids()),
-                "power_state": self.get_power_state()
-            }
-        except Exception as e:
-            logger.error(f"Error getting system metrics: {e}")
-            return {}
-    
-    def is_monitoring(self):
-        """Check if monitoring is active"""
+"""
+PC system monitoring for power events and system status.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import time
+import threading
+import logging
+import psutil
+from .constants import WINDOWS_MONITORING
+
+logger = logging.getLogger(__name__)
+
+# Static system information and its JSON, keyed by (hostname, WMI available);
+# it only changes with a reboot, so it is collected once per process
+_SYSTEM_INFO_CACHE = {}
+
+# WMI queries for system info, selecting only the properties that are used
+_WQL_COMPUTER_SYSTEM = "SELECT Name, Manufacturer, Model, TotalPhysicalMemory FROM Win32_ComputerSystem"
+_WQL_OPERATING_SYSTEM = "SELECT Caption, Version, OSArchitecture FROM Win32_OperatingSystem"
+_WQL_PROCESSOR = "SELECT Name, NumberOfCores, NumberOfLogicalProcessors FROM Win32_Processor"
+
+# Disk reported in system status: the Windows system drive root, e.g. C:\
+_DISK_PATH = os.environ.get("SystemDrive", "C:") + "\\" if psutil.WINDOWS else '/'
+
+# Seconds disk usage is reused; free space barely moves between publishes
+_DISK_USAGE_TTL = 300.0
+
+# Seconds a process count is reused; enumerating PIDs is slow on Windows
+_PROCESS_COUNT_TTL = 30.0
+
+# Smallest change that republishes a status field in a delta; other fields
+# are republished on any change
+_DELTA_THRESHOLDS = {
+    "uptime_seconds": 300.0,
+    "cpu_percent": 2.0,
+    "memory_percent": 1.0,
+    "memory_available_gb": 0.05,
+    "disk_percent": 0.5,
+    "disk_free_gb": 0.1,
+    "network_bytes_sent": 1 << 20,
+    "network_bytes_recv": 1 << 20
+}
+
+# Delta status publishes between full snapshots
+_FULL_STATUS_EVERY = 10
+
+# Consecutive failed monitor ticks before the loop halves its pace
+_FAILURE_BACKOFF_THRESHOLD = 5
+
+# Win32 input-idle query and PDH structures, bound once at import
+if psutil.WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+    
+    class _LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+    
+    _GetLastInputInfo = ctypes.windll.user32.GetLastInputInfo
+    _GetLastInputInfo.argtypes = [ctypes.POINTER(_LASTINPUTINFO)]
+    _GetLastInputInfo.restype = wintypes.BOOL
+    _GetTickCount = ctypes.windll.kernel32.GetTickCount
+    _GetTickCount.restype = wintypes.DWORD
+    
+    class _PDH_VALUE(ctypes.Union):
+        _fields_ = [("longValue", ctypes.c_long),
+                    ("doubleValue", ctypes.c_double),
+                    ("largeValue", ctypes.c_longlong)]
+    
+    class _PDH_FMT_COUNTERVALUE(ctypes.Structure):
+        _fields_ = [("CStatus", wintypes.DWORD), ("value", _PDH_VALUE)]
+else:
+    _GetLastInputInfo = None
+
+
+def _get_idle_seconds_win32():
+    """
+    Return seconds since the last keyboard or mouse input in this session
+    
+    Returns:
+        float: Idle seconds, or None if the query failed
+    """
+    info = _LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+    if not _GetLastInputInfo(ctypes.byref(info)):
+        return None
+    # Both tick counts are 32-bit and wrap after ~49 days
+    return ((_GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+
+class _PdhProcessCounter:
+    """
+    Read the process count from the \\System\\Processes performance counter
+    
+    A single counter read replaces enumerating every process as
+    psutil.pids() does. Windows only.
+    """
+    
+    _PDH_FMT_LONG = 0x00000100
+    
+    def __init__(self):
+        pdh = ctypes.windll.pdh
+        self._pdh = pdh
+        self._query = wintypes.HANDLE()
+        self._counter = wintypes.HANDLE()
+        
+        status = pdh.PdhOpenQueryW(None, 0, ctypes.byref(self._query))
+        if status:
+            raise OSError(f"PdhOpenQueryW failed: {status & 0xFFFFFFFF:#x}")
+        status = pdh.PdhAddEnglishCounterW(self._query, "\\System\\Processes", 0,
+                                           ctypes.byref(self._counter))
+        if status:
+            pdh.PdhCloseQuery(self._query)
+            raise OSError(f"PdhAddEnglishCounterW failed: {status & 0xFFFFFFFF:#x}")
+    
+    def read(self):
+        """Return the current number of processes"""
+        status = self._pdh.PdhCollectQueryData(self._query)
+        if status:
+            raise OSError(f"PdhCollectQueryData failed: {status & 0xFFFFFFFF:#x}")
+        value = _PDH_FMT_COUNTERVALUE()
+        status = self._pdh.PdhGetFormattedCounterValue(self._counter, self._PDH_FMT_LONG,
+                                                       None, ctypes.byref(value))
+        if status:
+            raise OSError(f"PdhGetFormattedCounterValue failed: {status & 0xFFFFFFFF:#x}")
+        return value.value.longValue
+
+
+# Per-thread COM state: nesting depth of _com_initialized() and the WMI
+# connection, which is only valid in the apartment that created it
+_COM_LOCAL = threading.local()
+
+
+@contextlib.contextmanager
+def _com_initialized(enabled=True):
+    """
+    Join the calling thread to the COM multithreaded apartment for a block
+    
+    COM initialization is per thread, so every thread that talks to WMI
+    uses this around that work. The thread's WMI connection is released
+    when its outermost block ends, before COM is uninitialized.
+    
+    Args:
+        enabled (bool): Skip COM setup entirely when False
+    """
+    initialized = False
+    if enabled:
+        try:
+            import pythoncom
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            initialized = True
+        except ImportError:
+            pass
+        except Exception as e:
+            # Already in another apartment on this thread (e.g. comtypes' STA)
+            logger.debug(f"COM not initialized for WMI on this thread: {e}")
+    
+    depth = getattr(_COM_LOCAL, "depth", 0)
+    _COM_LOCAL.depth = depth + 1
+    try:
+        yield
+    finally:
+        _COM_LOCAL.depth = depth
+        if depth == 0:
+            _COM_LOCAL.wmi = None
+        if initialized:
+            pythoncom.CoUninitialize()
+
+
+def _get_wmi():
+    """
+    Return the calling thread's WMI connection, connecting on first use
+    
+    Call inside _com_initialized(). The connection skips python-wmi's
+    class discovery, which is the slowest part of connecting.
+    
+    Returns:
+        wmi.WMI: Connected WMI namespace
+    """
+    connection = getattr(_COM_LOCAL, "wmi", None)
+    if connection is None:
+        import wmi
+        connection = _COM_LOCAL.wmi = wmi.WMI(find_classes=False)
+    return connection
+
+
+class PCSystemMonitor:
+    """Monitor PC system events and status"""
+    
+    def __init__(self, mqtt_client, config_manager):
+        """
+        Initialize system monitor
+        
+        Args:
+            mqtt_client: MQTT client instance
+            config_manager: Configuration manager instance
+        """
+        self.mqtt_client = mqtt_client
+        self.config_manager = config_manager
+        self.monitoring = False
+        self.monitor_thread = None
+        # Hidden window receiving WM_POWERBROADCAST (Windows only)
+        self.power_thread = None
+        self._power_hwnd = None
+        # Set once the listener window exists (or the listener gave up)
+        self._power_ready = threading.Event()
+        self._suspended = False
+        # Guards power state transitions and the publish bookkeeping, which
+        # the monitor loop, power listener and MQTT command handler share
+        self._state_lock = threading.RLock()
+        # _stop_event ends the monitor loop; _wake_event cuts its wait short
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self.last_power_state = "unknown"
+        self.system_info = {}
+        # Compact JSON of system_info, spliced into full status payloads
+        self._system_info_json = "{}"
+        # Monotonic, so clock adjustments can't fake idle time
+        self.last_activity_time = time.monotonic()
+        self.sleep_start_time = None
+        
+        # Get configuration
+        settings = config_manager.get_settings()
+        power_config = config_manager.get("power_management", {})
+        
+        self.monitor_interval = settings.get("monitor_interval", 5)
+        self.status_publish_interval = settings.get("status_publish_interval", 60)
+        # Unset (None) means power checks follow monitor_interval
+        power_poll_interval = settings.get("power_poll_interval")
+        self.power_poll_interval = self.monitor_interval if power_poll_interval is None else power_poll_interval
+        self.cpu_sample_interval = settings.get("cpu_sample_interval", 15)
+        self.detect_sleep_wake = power_config.get("detect_sleep_wake", True)
+        self.idle_threshold_minutes = power_config.get("idle_threshold_minutes", 30)
+        self._idle_threshold_s = self.idle_threshold_minutes * 60
+        self.sleep_detection_method = power_config.get("sleep_detection_method", "activity")
+        
+        # (monotonic time, value) of the last CPU sample; priming psutil here
+        # lets later non-blocking calls measure usage since the previous one
+        psutil.cpu_percent(interval=None)
+        self._cpu_cache = (float("-inf"), 0.0)
+        
+        # Inputs and result of the last activity-based power state check
+        self._last_power_inputs = None
+        self._last_power_result = "unknown"
+        
+        # Cached psutil readings for _snapshot(); boot time never changes
+        self._boot_time = psutil.boot_time()
+        self._snapshot_cache = (float("-inf"), None)
+        self._process_count_cache = (float("-inf"), 0)
+        self._disk_cache = (float("-inf"), None)
+        # PDH process counter: None until first tried, False if unavailable
+        self._pdh_processes = None
+        
+        # Field values as last published, for delta status messages
+        self._last_published = {}
+        self._published_system_info = None
+        self._deltas_since_full = 0
+        
+        # Timing of MQTT publishes since the last status message
+        self._publish_stats = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        
+        # WMI connects per thread on first access of self.wmi
+        self._wmi_enabled = WINDOWS_MONITORING and self.sleep_detection_method == "wmi"
+        if not WINDOWS_MONITORING:
+            logger.warning("Windows monitoring libraries not available")
+        
+        # Basic psutil info now; the WMI-enriched version follows in the background
+        self._get_system_info(use_wmi=False)
+        if self._wmi_enabled:
+            threading.Thread(target=self._get_system_info, name="system-info", daemon=True).start()
+        logger.info(f"PC system monitor initialized (method: {self.sleep_detection_method})")
+    
+    @property
+    def wmi(self):
+        """
+        The calling thread's WMI connection, created on first use
+        
+        Only use inside _com_initialized(). None if WMI is unavailable.
+        """
+        if not self._wmi_enabled:
+            return None
+        try:
+            return _get_wmi()
+        except Exception as e:
+            logger.error(f"Failed to initialize WMI: {e}")
+            self._wmi_enabled = False
+            self.sleep_detection_method = "activity"
+            return None
+    
+    def _get_system_info(self, use_wmi=True):
+        """
+        Get system information, reusing an earlier collection for this host
+        
+        Args:
+            use_wmi (bool): Include WMI details, connecting to WMI if needed
+        """
+        with _com_initialized(use_wmi and self._wmi_enabled):
+            wmi_connection = self.wmi if use_wmi else None
+            key = (socket.gethostname(), bool(wmi_connection))
+            cached = _SYSTEM_INFO_CACHE.get(key)
+            if cached is not None:
+                self.system_info, self._system_info_json = cached
+                return
+            
+            try:
+                # Basic system info using psutil
+                self.system_info = {
+                    "platform": "Windows",
+                    "boot_time": self._boot_time,
+                    "cpu_count": psutil.cpu_count(),
+                    "cpu_count_logical": psutil.cpu_count(logical=True)
+                }
+                
+                # Enhanced info with WMI if available
+                if wmi_connection:
+                    try:
+                        # Get computer system info
+                        computer = self._wmi_first(_WQL_COMPUTER_SYSTEM)
+                        if computer:
+                            self.system_info.update({
+                                "computer_name": computer.Name,
+                                "manufacturer": computer.Manufacturer,
+                                "model": computer.Model,
+                                "total_memory": int(computer.TotalPhysicalMemory) if computer.TotalPhysicalMemory else 0
+                            })
+                        
+                        # Get OS info
+                        os_info = self._wmi_first(_WQL_OPERATING_SYSTEM)
+                        if os_info:
+                            self.system_info.update({
+                                "os_name": os_info.Caption,
+                                "os_version": os_info.Version,
+                                "os_architecture": os_info.OSArchitecture
+                            })
+                        
+                        # Get CPU info (first processor only)
+                        processor = self._wmi_first(_WQL_PROCESSOR)
+                        if processor:
+                            self.system_info.update({
+                                "cpu_name": processor.Name,
+                                "cpu_cores": processor.NumberOfCores,
+                                "cpu_threads": processor.NumberOfLogicalProcessors
+                            })
+                            
+                    except Exception as e:
+                        logger.warning(f"Error getting WMI system info: {e}")
+                
+                self._system_info_json = json.dumps(self.system_info, separators=(",", ":"))
+                _SYSTEM_INFO_CACHE[key] = (self.system_info, self._system_info_json)
+                logger.debug(f"System info collected: {self.system_info}")
+                
+            except Exception as e:
+                logger.error(f"Error getting system info: {e}")
+    
+    def _wmi_first(self, wql):
+        """Return the first row of a WMI query, or None if it matched nothing"""
+        return next(iter(self.wmi.query(wql)), None)
+    
+    def _cpu_percent(self, max_age=None):
+        """
+        Get system CPU usage, reusing a recent sample
+        
+        psutil measures usage since its previous call, so a fresh value is
+        taken without blocking and is only refreshed once it is older than
+        max_age seconds (cpu_sample_interval by default).
+        
+        Args:
+            max_age (float): Maximum age of the cached sample in seconds
+            
+        Returns:
+            float: CPU usage percentage
+        """
+        if max_age is None:
+            max_age = self.cpu_sample_interval
+        
+        sampled_at, value = self._cpu_cache
+        now = time.monotonic()
+        if now - sampled_at >= max_age:
+            value = psutil.cpu_percent(interval=None)
+            self._cpu_cache = (now, value)
+        return value
+    
+    def _snapshot(self, ttl=None):
+        """
+        Get memory, disk, network and process figures, reusing a recent read
+        
+        The readings are shared by status publishing and get_system_metrics()
+        and refreshed at most once per ttl seconds (the monitor interval by
+        default). The process count and disk usage are refreshed less often.
+        
+        Args:
+            ttl (float): Maximum age of the cached readings in seconds
+            
+        Returns:
+            dict: Readings under the keys mem, disk, net, pids and boot
+        """
+        if ttl is None:
+            ttl = self.monitor_interval
+        
+        now = time.monotonic()
+        taken_at, snapshot = self._snapshot_cache
+        if snapshot is not None and now - taken_at < ttl:
+            return snapshot
+        
+        counted_at, process_count = self._process_count_cache
+        # The performance counter is cheap enough to read every time
+        if self._pdh_processes or now - counted_at >= _PROCESS_COUNT_TTL:
+            process_count = self._count_processes()
+            self._process_count_cache = (now, process_count)
+        
+        disk_read_at, disk = self._disk_cache
+        if disk is None or now - disk_read_at >= _DISK_USAGE_TTL:
+            disk = psutil.disk_usage(_DISK_PATH)
+            self._disk_cache = (now, disk)
+        
+        snapshot = {
+            "mem": psutil.virtual_memory(),
+            "disk": disk,
+            "net": psutil.net_io_counters(),
+            "pids": process_count,
+            "boot": self._boot_time
+        }
+        self._snapshot_cache = (now, snapshot)
+        return snapshot
+    
+    def _idle_seconds(self):
+        """
+        Get seconds since the last user activity
+        
+        Uses the real keyboard/mouse idle time on Windows and falls back to
+        the last update_activity_time() call elsewhere.
+        """
+        if _GetLastInputInfo is not None:
+            idle_seconds = _get_idle_seconds_win32()
+            if idle_seconds is not None:
+                return idle_seconds
+        return time.monotonic() - self.last_activity_time
+    
+    def _count_processes(self):
+        """Count running processes, via PDH on Windows and psutil elsewhere"""
+        if self._pdh_processes is None:
+            self._pdh_processes = False
+            if psutil.WINDOWS:
+                try:
+                    self._pdh_processes = _PdhProcessCounter()
+                except Exception as e:
+                    logger.debug(f"PDH process counter unavailable, using psutil: {e}")
+        
+        if self._pdh_processes:
+            try:
+                return self._pdh_processes.read()
+            except Exception as e:
+                logger.debug(f"Error reading PDH process counter: {e}")
+        return len(psutil.pids())
+    
+    def get_power_state(self):
+        """Get current power state"""
+        try:
+            if self.sleep_detection_method == "wmi" and self._wmi_enabled:
+                return self._get_power_state_wmi()
+            else:
+                return self._get_power_state_activity()
+                
+        except Exception as e:
+            logger.error(f"Error getting power state: {e}")
+            return "unknown"
+    
+    def _get_power_state_activity(self):
+        """
+        Get power state based on system activity
+        
+        The CPU sample only changes every cpu_sample_interval, so while it,
+        the idle flag and (at low CPU) the memory bucket are unchanged the
+        previous result is returned.
+        """
+        try:
+            # Get CPU usage and idle state
+            cpu_percent = self._cpu_percent()
+            idle = self._idle_seconds() > self._idle_threshold_s
+            # Memory only matters for the low-activity check
+            low_memory = None
+            if not idle and cpu_percent < 5:
+                low_memory = psutil.virtual_memory().percent < 50
+            
+            inputs = (cpu_percent, idle, low_memory)
+            if inputs == self._last_power_inputs:
+                return self._last_power_result
+            
+            # Determine power state based on activity
+            if idle:
+                state = "idle"
+            elif low_memory:
+                state = "low_activity"
+            elif cpu_percent > 80:
+                state = "active_high"
+            else:
+                state = "active"
+            
+            self._last_power_inputs = inputs
+            self._last_power_result = state
+            return state
+                
+        except Exception as e:
+            logger.error(f"Error getting activity-based power state: {e}")
+            return "unknown"
+    
+    def _get_power_state_wmi(self):
+        """Get power state using WMI (more accurate but Windows-specific)"""
+        try:
+            # This is a placeholder for more sophisticated WMI-based detection
+            # In practice, you'd query Win32_PowerManagementEvent or similar
+            return self._get_power_state_activity()
+        except Exception as e:
+            logger.error(f"Error getting WMI power state: {e}")
+            return "unknown"
+    
+    def _timed_publish(self, publish, *args, **kwargs):
+        """Call an MQTT publish method, add its duration to the publish stats and return its result"""
+        start = time.perf_counter()
+        try:
+            return publish(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._state_lock:
+                stats = self._publish_stats
+                stats["count"] += 1
+                stats["total_ms"] += elapsed_ms
+                if elapsed_ms > stats["max_ms"]:
+                    stats["max_ms"] = elapsed_ms
+    
+    def _take_publish_stats(self):
+        """Return the publish stats gathered since the last call and start over"""
+        stats = self._publish_stats
+        self._publish_stats = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        return stats
+    
+    def reset_published_status(self):
+        """Forget what was last published so the next status is a full snapshot"""
+        with self._state_lock:
+            self._last_published = {}
+    
+    def _status_field_changed(self, key, value):
+        """Check whether a status field moved enough since it was last published"""
+        if key not in self._last_published:
+            return True
+        last = self._last_published[key]
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(last, (int, float)):
+            return abs(value - last) > _DELTA_THRESHOLDS.get(key, 0)
+        return value != last
+    
+    def publish_system_status(self, force_full=False):
+        """
+        Publish comprehensive system status
+        
+        A full snapshot is sent first and then every _FULL_STATUS_EVERY
+        publishes; in between only the fields that changed noticeably are
+        sent, marked with "delta": true and not retained so the retained
+        message stays a full snapshot.
+        
+        Args:
+            force_full (bool): Send a full snapshot regardless of the schedule
+            
+        Returns:
+            bool: False if collecting or publishing the status failed
+        """
+        with self._state_lock:
+            return self._publish_system_status(force_full)
+    
+    def _publish_system_status(self, force_full):
+        """Collect and publish the system status (state lock held)"""
+        try:
+            # Get current system metrics
+            cpu_percent = self._cpu_percent()
+            snapshot = self._snapshot()
+            memory = snapshot["mem"]
+            disk = snapshot["disk"]
+            network = snapshot["net"]
+            process_count = snapshot["pids"]
+            
+            # Get uptime
+            uptime_seconds = time.time() - snapshot["boot"]
+            
+            status_data = {
+                "timestamp": time.time(),
+                "power_state": self.get_power_state(),
+                "uptime_seconds": uptime_seconds,
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory.percent,
+                "memory_available_gb": memory.available / (1024**3),
+                "memory_total_gb": memory.total / (1024**3),
+                "disk_percent": disk.percent,
+                "disk_free_gb": disk.free / (1024**3),
+                "disk_total_gb": disk.total / (1024**3),
+                "process_count": process_count,
+                "network_bytes_sent": network.bytes_sent,
+                "network_bytes_recv": network.bytes_recv,
+                "monitoring_config": {
+                    "detection_method": self.sleep_detection_method,
+                    "idle_threshold_minutes": self.idle_threshold_minutes,
+                    "monitor_interval": self.monitor_interval
+                }
+            }
+            
+            if force_full or not self._last_published or self._deltas_since_full >= _FULL_STATUS_EVERY:
+                # Publish timings are summarized once per full snapshot
+                status_data["publish_stats"] = self._take_publish_stats()
+                # system_info is static, so splice in its pre-serialized JSON
+                payload = (json.dumps(status_data, separators=(",", ":"))[:-1]
+                           + ',"system_info":' + self._system_info_json + "}")
+                if not self._timed_publish(self.mqtt_client.publish_system_status, payload):
+                    # Nothing reached the broker; keep the baseline as it was
+                    logger.debug("System status not published")
+                    return True
+                self._last_published = status_data
+                self._published_system_info = self.system_info
+                self._deltas_since_full = 0
+                logger.debug("System status published")
+                return True
+            
+            delta = {key: value for key, value in status_data.items()
+                     if key != "timestamp" and self._status_field_changed(key, value)}
+            system_info = self.system_info
+            if system_info is not self._published_system_info:
+                delta["system_info"] = system_info
+            if not delta:
+                self._deltas_since_full += 1
+                logger.debug("System status unchanged, nothing published")
+                return True
+            
+            changed = dict(delta)
+            delta["timestamp"] = status_data["timestamp"]
+            delta["delta"] = True
+            if not self._timed_publish(self.mqtt_client.publish_system_status, delta, retain=False):
+                logger.debug("System status delta not published")
+                return True
+            changed.pop("system_info", None)
+            self._last_published.update(changed)
+            self._published_system_info = system_info
+            self._deltas_since_full += 1
+            logger.debug("System status delta published: %s", list(delta))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error publishing system status: {e}")
+            return False
+    
+    def detect_power_events(self):
+        """
+        Enhanced sleep/wake event detection
+        
+        Returns:
+            bool: False if the detection failed
+        """
+        try:
+            if not self.detect_sleep_wake:
+                return True
+                
+            with self._state_lock:
+                current_state = self.get_power_state()
+                
+                if current_state != self.last_power_state:
+                    logger.info(f"Power state changed: {self.last_power_state} -> {current_state}")
+                    
+                    # Publish power event
+                    power_event = {
+                        "event": "state_change",
+                        "from_state": self.last_power_state,
+                        "to_state": current_state,
+                        "timestamp": time.time(),
+                        "system_uptime": time.time() - self._boot_time,
+                        "detection_method": self.sleep_detection_method
+                    }
+                    
+                    self._timed_publish(self.mqtt_client.publish_power_event, "state_change", power_event)
+                    
+                    # Record the new state before the slow sleep/wake handling
+                    previous_state = self.last_power_state
+                    self.last_power_state = current_state
+                    
+                    # Special handling for sleep events
+                    if current_state in ["sleep", "hibernate", "idle"] and previous_state in ["active", "active_high", "low_activity"]:
+                        self._on_sleep(current_state)
+                    
+                    # Special handling for wake events
+                    if previous_state in ["sleep", "hibernate", "idle"] and current_state in ["active", "active_high", "low_activity"]:
+                        self._on_wake("user_activity")
+            
+            return True
+                
+        except Exception as e:
+            logger.error(f"Error detecting power events: {e}")
+            return False
+    
+    def _on_sleep(self, sleep_type):
+        """Notify the ESP32 that the system is going to sleep or idle"""
+        logger.info("System entering sleep/idle state - notifying ESP32")
+        self.sleep_start_time = time.time()
+        
+        sleep_event = {
+            "event": "sleep_detected",
+            "sleep_type": sleep_type,
+            "timestamp": time.time(),
+            "last_activity": self._get_last_activity_time(),
+            "idle_duration": self._idle_seconds() / 60
+        }
+        self._timed_publish(self.mqtt_client.publish_power_event, "sleep_detected", sleep_event)
+    
+    def _on_wake(self, wake_source):
+        """Notify the ESP32 of a wake and resync volume and status"""
+        logger.info("System wake detected - notifying ESP32")
+        
+        wake_event = {
+            "event": "wake_detected",
+            "wake_source": wake_source,
+            "timestamp": time.time(),
+            "sleep_duration": self._calculate_sleep_duration()
+        }
+        self._timed_publish(self.mqtt_client.publish_power_event, "wake_detected", wake_event)
+        
+        # Update activity time
+        self.last_activity_time = time.monotonic()
+        
+        self._refresh_boot_time()
+        
+        # Refresh applications after wake
+        if hasattr(self.mqtt_client, 'volume_controller'):
+            self.mqtt_client.volume_controller.refresh_applications()
+            # Publish current volume state; the ESP32 may have missed updates
+            # while the PC was asleep, so don't skip a repeated value
+            vol = self.mqtt_client.volume_controller.get_volume()
+            self._timed_publish(self.mqtt_client.publish_volume_change, vol, force=True)
+        
+        # Publish updated system status
+        self.publish_system_status(force_full=True)
+    
+    def _start_power_listener(self):
+        """Start the thread that receives Windows suspend/resume notifications"""
+        if self.power_thread and self.power_thread.is_alive():
+            return
+        self._power_ready.clear()
+        self.power_thread = threading.Thread(target=self._power_listener_loop, daemon=True)
+        self.power_thread.start()
+    
+    def _stop_power_listener(self):
+        """Close the power notification window and wait for its thread"""
+        if self.power_thread and self.power_thread.is_alive():
+            # The thread may still be creating its window
+            self._power_ready.wait(timeout=2)
+        hwnd = self._power_hwnd
+        if hwnd:
+            try:
+                import win32con
+                import win32gui
+                win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+            except Exception as e:
+                logger.debug(f"Could not close power listener window: {e}")
+        if self.power_thread and self.power_thread.is_alive():
+            self.power_thread.join(timeout=2)
+    
+    def _power_listener_loop(self):
+        """
+        Receive WM_POWERBROADCAST on a hidden window and publish sleep/wake
+        
+        Suspend and resume are reported the moment Windows announces them;
+        the activity polling in detect_power_events() keeps handling idle.
+        The window is a hidden top-level one because message-only windows
+        don't receive broadcast messages.
+        """
+        try:
+            import win32api
+            import win32con
+            import win32gui
+            
+            def on_power_broadcast(hwnd, msg, wparam, lparam):
+                try:
+                    # The state is updated first, under the lock the polling in
+                    # detect_power_events() takes, so it can't report the same
+                    # transition again while the handlers run
+                    if wparam == win32con.PBT_APMSUSPEND:
+                        with self._state_lock:
+                            self._suspended = True
+                            self.last_power_state = "sleep"
+                            self._on_sleep("suspend")
+                    elif wparam in (win32con.PBT_APMRESUMEAUTOMATIC, win32con.PBT_APMRESUMESUSPEND):
+                        # Both resume messages can arrive for one wake
+                        with self._state_lock:
+                            if self._suspended:
+                                self._suspended = False
+                                self.last_power_state = "active"
+                                self._on_wake("resume")
+                except Exception as e:
+                    logger.error(f"Error handling power broadcast: {e}")
+                return True
+            
+            def on_destroy(hwnd, msg, wparam, lparam):
+                win32gui.PostQuitMessage(0)
+                return 0
+            
+            wc = win32gui.WNDCLASS()
+            wc.hInstance = win32api.GetModuleHandle(None)
+            wc.lpszClassName = "PCVolumeControlPowerListener"
+            wc.lpfnWndProc = {
+                win32con.WM_POWERBROADCAST: on_power_broadcast,
+                win32con.WM_DESTROY: on_destroy
+            }
+            class_atom = win32gui.RegisterClass(wc)
+            self._power_hwnd = win32gui.CreateWindow(class_atom, "", 0, 0, 0, 0, 0, 0, 0, wc.hInstance, None)
+            self._power_ready.set()
+            logger.info("Power broadcast listener started")
+            
+            win32gui.PumpMessages()
+            
+            win32gui.UnregisterClass(class_atom, wc.hInstance)
+        except Exception as e:
+            logger.error(f"Power broadcast listener failed: {e}")
+        finally:
+            self._power_hwnd = None
+            self._power_ready.set()
+        
+        logger.info("Power broadcast listener stopped")
+    
+    def _refresh_boot_time(self):
+        """Re-read the boot time after a wake and re-collect system info if it moved"""
+        boot_time = psutil.boot_time()
+        # psutil derives boot time from the wall clock, so allow for rounding
+        if abs(boot_time - self._boot_time) > 1:
+            logger.info("Boot time changed, refreshing system info")
+            self._boot_time = boot_time
+            self._snapshot_cache = (float("-inf"), None)
+            _SYSTEM_INFO_CACHE.clear()
+            self._get_system_info()
+    
+    def _get_last_activity_time(self):
+        """Get timestamp of last user activity"""
+        try:
+            return time.time() - self._idle_seconds()
+        except Exception as e:
+            logger.error(f"Error getting last activity time: {e}")
+            return time.time()
+    
+    def _calculate_sleep_duration(self):
+        """Calculate how long the system was asleep"""
+        try:
+            if self.sleep_start_time:
+                duration = time.time() - self.sleep_start_time
+                self.sleep_start_time = None
+                return duration
+            else:
+                # Fallback calculation based on uptime vs expected uptime
+                return 0
+        except Exception as e:
+            logger.error(f"Error calculating sleep duration: {e}")
+            return 0
+    
+    def update_activity_time(self):
+        """Update the last activity time (can be called externally)"""
+        self.last_activity_time = time.monotonic()
+    
+    def start_monitoring(self):
+        """Start system monitoring"""
+        if not self.monitoring:
+            self.monitoring = True
+            self._stop_event.clear()
+            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+            self.monitor_thread.start()
+            if WINDOWS_MONITORING and self.detect_sleep_wake:
+                self._start_power_listener()
+            logger.info("System monitoring started")
+        else:
+            logger.warning("System monitoring already running")
+    
+    def stop_monitoring(self):
+        """Stop system monitoring"""
+        if self.monitoring:
+            self.monitoring = False
+            self._stop_event.set()
+            self._wake_event.set()
+            self._stop_power_listener()
+            if self.monitor_thread and self.monitor_thread.is_alive():
+                self.monitor_thread.join(timeout=5)
+            logger.info("System monitoring stopped")
+        else:
+            logger.warning("System monitoring not running")
+    
+    def force_tick(self):
+        """Run a power state check and status publish without waiting for the schedule"""
+        self._wake_event.set()
+    
+    def _monitor_loop(self):
+        """
+        Main monitoring loop
+        
+        Power state checks are cheap and run every power_poll_interval;
+        full status publishes run on their own, slower schedule. Both
+        handle their own errors; after repeated failures the loop runs at
+        half pace until a tick succeeds again.
+        """
+        # The loop's thread keeps its own COM apartment and WMI connection
+        with _com_initialized(self._wmi_enabled):
+            now = time.monotonic()
+            next_power_poll = now
+            next_status_publish = now
+            failures = 0
+            
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                ok = True
+                pace = 2 if failures >= _FAILURE_BACKOFF_THRESHOLD else 1
+                
+                # Detect power events
+                if now >= next_power_poll:
+                    ok = self.detect_power_events() and ok
+                    next_power_poll = now + self.power_poll_interval * pace
+                
+                # Publish system status periodically
+                if now >= next_status_publish:
+                    ok = self.publish_system_status() and ok
+                    next_status_publish = now + self.status_publish_interval * pace
+                
+                if ok:
+                    if failures >= _FAILURE_BACKOFF_THRESHOLD:
+                        logger.info("System monitor recovered, resuming normal pace")
+                    failures = 0
+                else:
+                    failures += 1
+                    if failures == _FAILURE_BACKOFF_THRESHOLD:
+                        logger.warning(f"System monitor failed {failures} times in a row, slowing down")
+                
+                timeout = max(min(next_power_poll, next_status_publish) - time.monotonic(), 0)
+                if self._wake_event.wait(timeout):
+                    # Woken by force_tick() or stop_monitoring()
+                    self._wake_event.clear()
+                    next_power_poll = next_status_publish = time.monotonic()
+        
+        logger.info("System monitor loop ended")
+    
+    def get_system_metrics(self):
+        """Get current system metrics"""
+        try:
+            snapshot = self._snapshot()
+            return {
+                "cpu_percent": self._cpu_percent(),
+                "memory": snapshot["mem"]._asdict(),
+                "disk": snapshot["disk"]._asdict(),
+                "network": snapshot["net"]._asdict(),
+                "boot_time": snapshot["boot"],
+                "process_count": snapshot["pids"],
+                "power_state": self.get_power_state()
+            }
+        except Exception as e:
+            logger.error(f"Error getting system metrics: {e}")
+            return {}
+    
+    def is_monitoring(self):
+        """Check if monitoring is active"""
         return self.monitoring
\ No newline at end of file
@@ -1,262 +1,434 @@
-"""
-Windows volume controller with per-application support.
-"""
-
-import sys
-import time
-import threading
-import logging
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume, ISimpleAudioVolume
-
-logger = logging.getLogger(__name__)
-
-
-class WindowsVolumeController:
-    """Enhanced Windows volume controller with per-application support"""
-    
-    def __init__(self, monitored_apps=None, update_rate_limit=0.1, sync_interval=2.0):
-        """
-        Initialize the volume controller
-        
-        Args:
-            monitored_apps (list): List of application executables to monitor
-            update_rate_limit (float): Minimum seconds between volume updates
-            sync_interval (float): Seconds between volume sync checks
-        """
-        self.monitored_apps = monitored_apps or []
-        self.update_rate_limit = update_rate_limit
-        self.sync_interval = sync_interval
-        
-        self.devices = None
-        self.interface = None
-        self.volume = None
-        self.last_update = 0
-        self.current_volume = 0
-        self.app_volumes = {}  # Store per-app volume controls
-        self.last_sync = 0
-        self.volume_lock = threading.Lock()
-        
-        try:
-            self._initialize_audio()
-            self._scan_applications()
-            logger.info("Enhanced volume controller initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize volume controller: {e}")
-            raise
-    
-    def _initialize_audio(self):
-        """Initialize audio interface"""
-        try:
-            # Get default audio device
-            self.devices = AudioUtilities.GetSpeakers()
-            self.interface = self.devices.Activate(
-                IAudioEndpointVolume._iid_, 
-                CLSCTX_ALL, 
-                None
-            )
-            self.volume = cast(self.interface, POINTER(IAudioEndpointVolume))
-            
-            # Get current volume
-            self.current_volume = int(self.volume.GetMasterVolumeLevelScalar() * 100)
-            logger.info(f"Current system volume: {self.current_volume}%")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize audio interface: {e}")
-            raise
-    
-    def set_volume(self, level):
-        """
-        Set system volume level
-        
-        Args:
-            level (int): Volume level 0-100
-        
-        Returns:
-            bool: True if successful, False otherwise
-        """
-        try:
-            # Rate limiting
-            current_time = time.time()
-            if current_time - self.last_update < self.update_rate_limit:
-                return False
-            
-            # Validate range
-            level = max(0, min(100, level))
-            
-            # Convert percentage to scalar (0.0 - 1.0)
-            scalar_level = level / 100.0
-            
-            # Set volume
-            self.volume.SetMasterVolumeLevelScalar(scalar_level, None)
-            self.current_volume = level
-            self.last_update = current_time
-            
-            logger.debug(f"Volume set to {level}%")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error setting volume: {e}")
-            return False
-    
-    def get_volume(self):
-        """
-        Get current system volume level
-        
-        Returns:
-            int: Current volume level 0-100
-        """
-        try:
-            scalar = self.volume.GetMasterVolumeLevelScalar()
-            return int(scalar * 100)
-        except Exception as e:
-            logger.error(f"Error getting volume: {e}")
-            return self.current_volume
-    
-    def mute(self):
-        """Mute system audio"""
-        try:
-            self.volume.SetMute(1, None)
-            logger.info("Audio muted")
-            return True
-        except Exception as e:
-            logger.error(f"Error muting audio: {e}")
-            return False
-    
-    def unmute(self):
-        """Unmute system audio"""
-        try:
-            self.volume.SetMute(0, None)
-            logger.info("Audio unmuted")
-            return True
-        except Exception as e:
-            logger.error(f"Error unmuting audio: {e}")
-            return False
-    
-    def is_muted(self):
-        """Check if audio is muted"""
-        try:
-            return bool(self.volume.GetMute())
-        except Exception as e:
-            logger.error(f"Error checking mute status: {e}")
-            return False
-    
-    def _scan_applications(self):
-        """Scan for audio applications and get their volume controls"""
-        try:
-            sessions = AudioUtilities.GetAllSessions()
-            self.app_volumes.clear()
-            
-            for session in sessions:
-                if session.Process and session.Process.name():
-                    app_name = session.Process.name()
-                    if app_name in self.monitored_apps:
-                        volume_control = session._ctl.QueryInterface(ISimpleAudioVolume)
-                        self.app_volumes[app_name] = {
-                            'control': volume_control,
-                            'session': session,
-                            'volume': int(volume_control.GetMasterVolume() * 100)
-                        }
-                        logger.debug(f"Found audio app: {app_name}")
-            
-            logger.info(f"Monitoring {len(self.app_volumes)} audio applications")
-            
-        except Exception as e:
-            logger.error(f"Error scanning applications: {e}")
-    
-    def get_app_volume(self, app_name):
-        """Get volume for specific application"""
-        try:
-            if app_name in self.app_volumes:
-                control = self.app_volumes[app_name]['control']
-                volume = int(control.GetMasterVolume() * 100)
-                self.app_volumes[app_name]['volume'] = volume
-                return volume
-            return None
-        except Exception as e:
-            logger.error(f"Error getting volume for {app_name}: {e}")
-            return None
-    
-    def set_app_volume(self, app_name, level):
-        """Set volume for specific application"""
-        try:
-            if app_name in self.app_volumes:
-                level = max(0, min(100, level))
-                scalar_level = level / 100.0
-                
-                control = self.app_volumes[app_name]['control']
-                control.SetMasterVolume(scalar_level, None)
-                self.app_volumes[app_name]['volume'] = level
-                
-                logger.info(f"Set {app_name} volume to {level}%")
-                return True
-            else:
-                logger.warning(f"Application {app_name} not found")
-                return False
-        except Exception as e:
-            logger.error(f"Error setting volume for {app_name}: {e}")
-            return False
-    
-    def get_all_app_volumes(self):
-        """Get volumes for all monitored applications"""
-        volumes = {}
-        for app_name in self.app_volumes:
-            volume = self.get_app_volume(app_name)
-            if volume is not None:
-                volumes[app_name] = volume
-        return volumes
-    
-    def refresh_applications(self):
-        """Refresh the list of monitored applications"""
-        self._scan_applications()
-    
-    def sync_volume_from_system(self):
-        """Check if system volume changed externally and return new volume"""
-        try:
-            with self.volume_lock:
-                current_time = time.time()
-                if current_time - self.last_sync < self.sync_interval:
-                    return None
-                
-                system_volume = self.get_volume()
-                if abs(system_volume - self.current_volume) > 1:  # 1% threshold
-                    self.current_volume = system_volume
-                    self.last_sync = current_time
-                    logger.debug(f"System volume changed externally to {system_volume}%")
-                    return system_volume
-                
-                self.last_sync = current_time
-                return None
-        except Exception as e:
-            logger.error(f"Error syncing volume: {e}")
-            return None
-    
-    def update_monitored_apps(self, monitored_apps):
-        """Update the list of monitored applications"""
-        self.monitored_apps = monitored_apps or []
-        self.refresh_applications()
-        logger.info(f"Updated monitored apps: {self.monitored_apps}")
-    
-    def get_audio_device_info(self):
-        """Get information about the current audio device"""
-        try:
-            if self.devices:
-                return {
-                    "device_name": str(self.devices),
-                    "current_volume": self.get_volume(),
-                    "is_muted": self.is_muted(),
-                    "monitored_apps": len(self.app_volumes)
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error getting audio device info: {e}")
-            return None
-    
-    def cleanup(self):
-        """Clean up resources"""
-        try:
-            self.app_volumes.clear()
-            logger.info("Volume controller cleaned up")
-        except Exception as e:
+"""
+Windows volume controller with per-application support.
+"""
+
+import sys
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import cast, POINTER
+import comtypes
+from comtypes import CLSCTX_ALL
+from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume, ISimpleAudioVolume
+
+logger = logging.getLogger(__name__)
+
+# Seconds a master volume/mute reading is reused, so back-to-back callers
+# within one UI event share a single pair of COM calls
+_STATE_CACHE_TTL = 0.05
+
+# Minimum seconds between session rescans requested by refresh_applications
+_MIN_SCAN_INTERVAL = 1.0
+
+# Worker threads reading application volumes concurrently
+_APP_READ_WORKERS = 4
+
+# Seconds cleanup() waits for every read worker to leave the COM apartment
+_WORKER_EXIT_TIMEOUT = 2.0
+
+
+def _init_com_worker():
+    """Join the multithreaded COM apartment on a volume read worker"""
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+
+
+def _exit_com_worker(barrier):
+    """Leave the COM apartment on a volume read worker"""
+    try:
+        # Holding each task until all have started puts one on every worker
+        barrier.wait(_WORKER_EXIT_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        comtypes.CoUninitialize()
+
+
+def _read_app_volume(item):
+    """
+    Read one app_volumes item
+    
+    Returns:
+        tuple: (app_name, volume), (app_name, None) if the process has exited,
+            or (app_name, exception) if the read failed
+    """
+    app_name, entry = item
+    try:
+        if not entry['session'].Process.is_running():
+            return app_name, None
+        return app_name, int(entry['control'].GetMasterVolume() * 100)
+    except Exception as e:
+        return app_name, e
+
+
+class WindowsVolumeController:
+    """Enhanced Windows volume controller with per-application support"""
+    
+    def __init__(self, monitored_apps=None, update_rate_limit=0.1, sync_interval=2.0):
+        """
+        Initialize the volume controller
+        
+        Args:
+            monitored_apps (list): List of application executables to monitor
+            update_rate_limit (float): Minimum seconds between volume updates
+            sync_interval (float): Seconds between volume sync checks
+        """
+        self.monitored_apps = monitored_apps or []
+        # Set view of monitored_apps for constant-time lookups while scanning
+        self._monitored_set = frozenset(self.monitored_apps)
+        self.update_rate_limit = update_rate_limit
+        self.sync_interval = sync_interval
+        
+        self.devices = None
+        self._device_name = None
+        self.interface = None
+        self.volume = None
+        self.last_update = 0
+        self.current_volume = 0
+        self.app_volumes = {}  # Store per-app volume controls
+        self.last_sync = 0
+        self._last_scan = float("-inf")
+        self.volume_lock = threading.Lock()
+        # (monotonic time, volume, muted) of the last master volume reading
+        self._state_cache = (float("-inf"), 0, False)
+        # Overlaps the per-application COM reads; threads start on first use.
+        # Session pointers are created and used only on these workers, which
+        # share the multithreaded apartment, so they never need marshaling.
+        self._read_pool = ThreadPoolExecutor(max_workers=_APP_READ_WORKERS,
+                                             thread_name_prefix="vol-read",
+                                             initializer=_init_com_worker)
+        
+        try:
+            self._initialize_audio()
+            self._scan_applications()
+            logger.info("Enhanced volume controller initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize volume controller: {e}")
+            raise
+    
+    def _initialize_audio(self):
+        """Initialize audio interface"""
+        try:
+            # Get default audio device
+            self.devices = AudioUtilities.GetSpeakers()
+            self.interface = self.devices.Activate(
+                IAudioEndpointVolume._iid_, 
+                CLSCTX_ALL, 
+                None
+            )
+            self.volume = cast(self.interface, POINTER(IAudioEndpointVolume))
+            self._device_name = str(self.devices)
+            
+            # Get current volume
+            self.current_volume = int(self.volume.GetMasterVolumeLevelScalar() * 100)
+            logger.info(f"Current system volume: {self.current_volume}%")
+            
+        except Exception as e:
+            logger.error(f"Failed to initialize audio interface: {e}")
+            raise
+    
+    def set_volume(self, level):
+        """
+        Set system volume level
+        
+        Args:
+            level (int): Volume level 0-100
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            # Rate limiting
+            current_time = time.time()
+            if current_time - self.last_update < self.update_rate_limit:
+                return False
+            
+            # Validate range
+            level = max(0, min(100, level))
+            
+            # Convert percentage to scalar (0.0 - 1.0)
+            scalar_level = level / 100.0
+            
+            # Set volume
+            self.volume.SetMasterVolumeLevelScalar(scalar_level, None)
+            self._invalidate_state()
+            self.current_volume = level
+            self.last_update = current_time
+            
+            logger.debug(f"Volume set to {level}%")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error setting volume: {e}")
+            return False
+    
+    def _read_state(self):
+        """
+        Read master volume and mute state, reusing a very recent reading
+        
+        Returns:
+            tuple: (volume 0-100, muted)
+        """
+        now = time.monotonic()
+        read_at, volume, muted = self._state_cache
+        if now - read_at < _STATE_CACHE_TTL:
+            return volume, muted
+        
+        volume = int(self.volume.GetMasterVolumeLevelScalar() * 100)
+        muted = bool(self.volume.GetMute())
+        self._state_cache = (now, volume, muted)
+        return volume, muted
+    
+    def _invalidate_state(self):
+        """Force the next read to query the endpoint again"""
+        self._state_cache = (float("-inf"), 0, False)
+    
+    def get_volume(self):
+        """
+        Get current system volume level
+        
+        Returns:
+            int: Current volume level 0-100
+        """
+        try:
+            return self._read_state()[0]
+        except Exception as e:
+            logger.error(f"Error getting volume: {e}")
+            return self.current_volume
+    
+    def mute(self):
+        """Mute system audio"""
+        try:
+            self.volume.SetMute(1, None)
+            self._invalidate_state()
+            logger.info("Audio muted")
+            return True
+        except Exception as e:
+            logger.error(f"Error muting audio: {e}")
+            return False
+    
+    def unmute(self):
+        """Unmute system audio"""
+        try:
+            self.volume.SetMute(0, None)
+            self._invalidate_state()
+            logger.info("Audio unmuted")
+            return True
+        except Exception as e:
+            logger.error(f"Error unmuting audio: {e}")
+            return False
+    
+    def is_muted(self):
+        """Check if audio is muted"""
+        try:
+            return self._read_state()[1]
+        except Exception as e:
+            logger.error(f"Error checking mute status: {e}")
+            return False
+    
+    def _call_in_mta(self, func, *args):
+        """
+        Run func on a read worker and return its result
+        
+        Once cleanup() has shut the pool down, func runs on the calling thread.
+        """
+        try:
+            future = self._read_pool.submit(func, *args)
+        except RuntimeError:
+            return func(*args)
+        return future.result()
+    
+    def _scan_applications(self):
+        """Scan for audio applications on a read worker (see _scan_sessions)"""
+        self._call_in_mta(self._scan_sessions)
+    
+    def _scan_sessions(self):
+        """
+        Scan for audio applications and get their volume controls
+        
+        Entries whose session still belongs to the same process are kept, so
+        only newly seen applications cost a QueryInterface call.
+        """
+        try:
+            self._last_scan = time.monotonic()
+            sessions = AudioUtilities.GetAllSessions()
+            previous = self.app_volumes
+            app_volumes = {}
+            
+            for session in sessions:
+                if session.Process and session.Process.name():
+                    app_name = session.Process.name()
+                    if app_name in self._monitored_set:
+                        entry = previous.get(app_name)
+                        if entry is not None and entry['pid'] == session.ProcessId:
+                            app_volumes[app_name] = entry
+                            continue
+                        if app_name in app_volumes:
+                            continue
+                        
+                        volume_control = session._ctl.QueryInterface(ISimpleAudioVolume)
+                        app_volumes[app_name] = {
+                            'control': volume_control,
+                            'session': session,
+                            'pid': session.ProcessId,
+                            'volume': int(volume_control.GetMasterVolume() * 100)
+                        }
+                        logger.debug(f"Found audio app: {app_name}")
+            
+            self.app_volumes = app_volumes
+            
+            logger.info(f"Monitoring {len(self.app_volumes)} audio applications")
+            
+        except Exception as e:
+            logger.error(f"Error scanning applications: {e}")
+    
+    def get_app_volume(self, app_name):
+        """Get volume for specific application"""
+        try:
+            if app_name in self.app_volumes:
+                control = self.app_volumes[app_name]['control']
+                volume = int(self._call_in_mta(control.GetMasterVolume) * 100)
+                self.app_volumes[app_name]['volume'] = volume
+                return volume
+            return None
+        except Exception as e:
+            logger.error(f"Error getting volume for {app_name}: {e}")
+            return None
+    
+    def set_app_volume(self, app_name, level):
+        """Set volume for specific application"""
+        try:
+            if app_name in self.app_volumes:
+                level = max(0, min(100, level))
+                scalar_level = level / 100.0
+                
+                control = self.app_volumes[app_name]['control']
+                self._call_in_mta(control.SetMasterVolume, scalar_level, None)
+                self.app_volumes[app_name]['volume'] = level
+                
+                logger.info(f"Set {app_name} volume to {level}%")
+                return True
+            else:
+                logger.warning(f"Application {app_name} not found")
+                return False
+        except Exception as e:
+            logger.error(f"Error setting volume for {app_name}: {e}")
+            return False
+    
+    def get_all_app_volumes(self):
+        """Get volumes for all monitored applications"""
+        app_volumes = self.app_volumes
+        try:
+            results = self._read_pool.map(_read_app_volume, app_volumes.items())
+        except RuntimeError:
+            # The pool was shut down by cleanup()
+            results = map(_read_app_volume, app_volumes.items())
+        
+        volumes = {}
+        for app_name, volume in results:
+            if volume is None:
+                # Release the session and its COM pointers now rather than
+                # holding them until the next rescan
+                app_volumes.pop(app_name, None)
+                logger.debug(f"Audio app exited: {app_name}")
+                continue
+            if isinstance(volume, Exception):
+                logger.error(f"Error getting volume for {app_name}: {volume}")
+                continue
+            app_volumes[app_name]['volume'] = volume
+            volumes[app_name] = volume
+        return volumes
+    
+    def get_state(self):
+        """
+        Read master volume, mute state and application volumes in one pass
+        
+        Returns:
+            dict: {"volume": int, "muted": bool, "apps": {app_name: volume}}
+        """
+        with self.volume_lock:
+            try:
+                volume, muted = self._read_state()
+            except Exception as e:
+                logger.error(f"Error getting volume state: {e}")
+                volume, muted = self.current_volume, False
+            return {
+                "volume": volume,
+                "muted": muted,
+                "apps": self.get_all_app_volumes()
+            }
+    
+    def refresh_applications(self, force=False):
+        """
+        Refresh the list of monitored applications
+        
+        Args:
+            force (bool): Rescan even if the last scan was under a second ago
+        """
+        if not force and time.monotonic() - self._last_scan < _MIN_SCAN_INTERVAL:
+            logger.debug("Skipping application rescan, last scan was too recent")
+            return
+        self._scan_applications()
+    
+    def sync_volume_from_system(self):
+        """Check if system volume changed externally and return new volume"""
+        try:
+            # Reject throttled calls without touching the lock
+            current_time = time.time()
+            if current_time - self.last_sync < self.sync_interval:
+                return None
+            
+            with self.volume_lock:
+                # Another caller may have synced while we waited
+                if current_time - self.last_sync < self.sync_interval:
+                    return None
+                
+                system_volume = self.get_volume()
+                if abs(system_volume - self.current_volume) > 1:  # 1% threshold
+                    self.current_volume = system_volume
+                    self.last_sync = current_time
+                    logger.debug(f"System volume changed externally to {system_volume}%")
+                    return system_volume
+                
+                self.last_sync = current_time
+                return None
+        except Exception as e:
+            logger.error(f"Error syncing volume: {e}")
+            return None
+    
+    def update_monitored_apps(self, monitored_apps):
+        """Update the list of monitored applications"""
+        self.monitored_apps = monitored_apps or []
+        self._monitored_set = frozenset(self.monitored_apps)
+        self.refresh_applications(force=True)
+        logger.info(f"Updated monitored apps: {self.monitored_apps}")
+    
+    def get_audio_device_info(self):
+        """Get information about the current audio device"""
+        try:
+            if self.devices:
+                state = self.get_state()
+                return {
+                    "device_name": self._device_name,
+                    "current_volume": state["volume"],
+                    "is_muted": state["muted"],
+                    "monitored_apps": len(self.app_volumes)
+                }
+            return None
+        except Exception as e:
+            logger.error(f"Error getting audio device info: {e}")
+            return None
+    
+    def cleanup(self):
+        """Clean up resources"""
+        try:
+            # Release the session pointers in their apartment, then take
+            # every worker out of it before the pool goes away
+            self._call_in_mta(self.app_volumes.clear)
+            barrier = threading.Barrier(_APP_READ_WORKERS)
+            for _ in range(_APP_READ_WORKERS):
+                self._read_pool.submit(_exit_com_worker, barrier)
+            self._read_pool.shutdown(wait=False)
+            logger.info("Volume controller cleaned up")
+        except Exception as e:
             logger.error(f"Error during cleanup: {e}")
\ No newline at end of file
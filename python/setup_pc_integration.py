@@ -1,491 +1,686 @@
-"""
-ESP32 Volume Control - PC Integration Setup Script
-=================================================
-
-This script sets up the complete PC integration system including:
-- Installing required dependencies
-- Configuring the system
-- Setting up logging
-- Creating desktop shortcuts
-- Optionally installing as Windows service
-
-Usage:
-    python setup_pc_integration.py [--service] [--config-only] [--uninstall]
-
-Options:
-    --service       Install as Windows service
-    --config-only   Only create/update configuration files
-    --uninstall     Uninstall the system
-
-Author: DJ Kruger
-Version: 1.0.0
-"""
-
-import sys
-import json
-import argparse
-import subprocess
-import shutil
-from pathlib import Path
-import logging
-
-# Setup basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class PCIntegrationSetup:
-    """Setup and configuration manager for PC integration"""
-    
-    def __init__(self):
-        self.script_dir = Path(__file__).parent
-        self.config_file = self.script_dir / "volume_control_config.json"
-        self.log_dir = self.script_dir / "logs"
-        
-    def run_setup(self, install_service=False, config_only=False, uninstall=False):
-        """Run the complete setup process"""
-        try:
-            print("=" * 60)
-            print("ESP32 Volume Control - PC Integration Setup")
-            print("=" * 60)
-            
-            if uninstall:
-                return self.uninstall_system()
-            
-            if config_only:
-                return self.setup_configuration()
-            
-            # Full installation
-            success = True
-            
-            # Step 1: Check Python version
-            print("1. Checking Python version...")
-            if not self.check_python_version():
-                return False
-            
-            # Step 2: Install dependencies
-            print("\n2. Installing Python dependencies...")
-            if not self.install_dependencies():
-                success = False
-            
-            # Step 3: Setup configuration
-            print("\n3. Setting up configuration...")
-            if not self.setup_configuration():
-                success = False
-            
-            # Step 4: Setup logging
-            print("\n4. Setting up logging...")
-            if not self.setup_logging():
-                success = False
-            
-            # Step 5: Create shortcuts
-            print("\n5. Creating desktop shortcuts...")
-            if not self.create_shortcuts():
-                success = False
-            
-            # Step 6: Install service (optional)
-            if install_service:
-                print("\n6. Installing Windows service...")
-                if not self.install_service():
-                    success = False
-            
-            # Step 7: Test installation
-            print("\n7. Testing installation...")
-            if not self.test_installation():
-                success = False
-            
-            if success:
-                print("\n" + "=" * 60)
-                print("Setup completed successfully!")
-                print("=" * 60)
-                self.print_usage_instructions(install_service)
-            else:
-                print("\n" + "=" * 60)
-                print("Setup completed with some errors. Please check the output above.")
-                print("=" * 60)
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Setup failed: {e}")
-            return False
-    
-    def check_python_version(self):
-        """Check if Python version is compatible"""
-        try:
-            version = sys.version_info
-            if version.major < 3 or (version.major == 3 and version.minor < 7):
-                print(f"❌ Python {version.major}.{version.minor} is not supported. Python 3.7+ required.")
-                return False
-            
-            print(f"✅ Python {version.major}.{version.minor}.{version.micro} is compatible")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error checking Python version: {e}")
-            return False
-    
-    def install_dependencies(self):
-        """Install required Python packages"""
-        try:
-            requirements_file = self.script_dir / "requirements.txt"
-            
-            if not requirements_file.exists():
-                print("❌ requirements.txt not found")
-                return False
-            
-            # Install packages
-            cmd = [sys.executable, "-m", "pip", "install", "-r", str(requirements_file)]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Dependencies installed successfully")
-                return True
-            else:
-                print(f"❌ Failed to install dependencies: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error installing dependencies: {e}")
-            return False
-    
-    def setup_configuration(self):
-        """Setup configuration files"""
-        try:
-            # Create default configuration if it doesn't exist
-            if not self.config_file.exists():
-                config = self.get_default_config()
-                
-                # Interactive configuration
-                print("\nConfiguring MQTT settings...")
-                broker = input(f"MQTT Broker IP [{config['mqtt']['broker']}]: ").strip()
-                if broker:
-                    config['mqtt']['broker'] = broker
-                
-                port = input(f"MQTT Port [{config['mqtt']['port']}]: ").strip()
-                if port:
-                    try:
-                        config['mqtt']['port'] = int(port)
-                    except ValueError:
-                        print("Invalid port number, using default")
-                
-                username = input("MQTT Username (optional): ").strip()
-                if username:
-                    config['mqtt']['username'] = username
-                    password = input("MQTT Password (optional): ").strip()
-                    if password:
-                        config['mqtt']['password'] = password
-                
-                # Save configuration
-                with open(self.config_file, 'w') as f:
-                    json.dump(config, f, indent=2)
-                
-                print(f"✅ Configuration saved to {self.config_file}")
-            else:
-                print(f"✅ Configuration file already exists: {self.config_file}")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error setting up configuration: {e}")
-            return False
-    
-    def get_default_config(self):
-        """Get default configuration"""
-        return {
-            "mqtt": {
-                "broker": "192.168.1.100",
-                "port": 1883,
-                "username": "",
-                "password": "",
-                "client_id": "PCVolumeControl",
-                "keepalive": 60,
-                "qos": 1,
-                "retain": True
-            },
-            "topics": {
-                "volume": "homecontrol/volume",
-                "command": "homecontrol/command",
-                "status": "homecontrol/pc/status",
-                "pc_volume": "homecontrol/pc/volume",
-                "app_volume": "homecontrol/pc/app_volume",
-                "pc_power": "homecontrol/pc/power",
-                "pc_system": "homecontrol/pc/system"
-            },
-            "apps": [
-                "chrome.exe",
-                "firefox.exe",
-                "msedge.exe",
-                "spotify.exe",
-                "discord.exe",
-                "vlc.exe",
-                "winamp.exe",
-                "foobar2000.exe",
-                "musicbee.exe",
-                "steam.exe"
-            ],
-            "settings": {
-                "update_rate_limit": 0.1,
-                "sync_interval": 2.0,
-                "reconnect_delay": 5.0,
-                "debug": True,
-                "enable_system_monitoring": True,
-                "enable_tray": True,
-                "monitor_interval": 5,
-                "status_publish_interval": 60,
-                "log_level": "INFO",
-                "log_file": "volume_control.log",
-                "max_log_size_mb": 10,
-                "backup_log_count": 3
-            },
-            "power_management": {
-                "detect_sleep_wake": True,
-                "notify_esp32_on_sleep": True,
-                "notify_esp32_on_wake": True,
-                "idle_threshold_minutes": 30,
-                "sleep_detection_method": "activity"
-            },
-            "diagnostics": {
-                "enable_performance_monitoring": True,
-                "collect_system_metrics": True,
-                "publish_diagnostics": True,
-                "diagnostic_interval": 300
-            }
-        }
-    
-    def setup_logging(self):
-        """Setup logging directories and configuration"""
-        try:
-            # Create logs directory
-            self.log_dir.mkdir(exist_ok=True)
-            
-            # Create logging configuration if it doesn't exist
-            logging_config_file = self.script_dir / "logging_config.json"
-            if logging_config_file.exists():
-                print(f"✅ Logging configuration exists: {logging_config_file}")
-            else:
-                print("❌ Logging configuration not found")
-                return False
-            
-            print(f"✅ Logging directory created: {self.log_dir}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error setting up logging: {e}")
-            return False
-    
-    def create_shortcuts(self):
-        """Create desktop shortcuts"""
-        try:
-            desktop = Path.home() / "Desktop"
-            
-            # Create batch files for easy launching
-            batch_files = [
-                ("ESP32 Volume Control.bat", "python volume_control.py --tray"),
-                ("ESP32 Volume Control (Console).bat", "python volume_control.py --no-tray"),
-                ("ESP32 Diagnostics.bat", "python diagnostics.py"),
-                ("ESP32 Service Install.bat", "python service_installer.py install"),
-                ("ESP32 Service Remove.bat", "python service_installer.py remove")
-            ]
-            
-            for filename, command in batch_files:
-                batch_file = self.script_dir / filename
-                with open(batch_file, 'w') as f:
-                    f.write("@echo off\n")
-                    f.write(f"cd /d \"{self.script_dir}\"\n")
-                    f.write(f"{command}\n")
-                    f.write("pause\n")
-                
-                # Copy to desktop if it exists
-                if desktop.exists():
-                    try:
-                        shutil.copy2(batch_file, desktop / filename)
-                    except Exception:
-                        pass  # Don't fail if we can't copy to desktop
-            
-            print("✅ Batch files created")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error creating shortcuts: {e}")
-            return False
-    
-    def install_service(self):
-        """Install Windows service"""
-        try:
-            service_script = self.script_dir / "service_installer.py"
-            
-            if not service_script.exists():
-                print("❌ Service installer not found")
-                return False
-            
-            # Install service
-            cmd = [sys.executable, str(service_script), "install"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Windows service installed successfully")
-                
-                # Ask if user wants to start the service
-                start_service = input("Start the service now? (y/n): ").strip().lower()
-                if start_service == 'y':
-                    cmd = [sys.executable, str(service_script), "start"]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0:
-                        print("✅ Service started successfully")
-                    else:
-                        print(f"❌ Failed to start service: {result.stderr}")
-                
-                return True
-            else:
-                print(f"❌ Failed to install service: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error installing service: {e}")
-            return False
-    
-    def test_installation(self):
-        """Test the installation"""
-        try:
-            # Test imports
-            print("Testing imports...")
-            
-            test_imports = [
-                "pycaw.pycaw",
-                "paho.mqtt.client",
-                "psutil",
-                "pystray",
-                "PIL"
-            ]
-            
-            failed_imports = []
-            for module in test_imports:
-                try:
-                    __import__(module)
-                    print(f"  ✅ {module}")
-                except ImportError:
-                    print(f"  ❌ {module}")
-                    failed_imports.append(module)
-            
-            if failed_imports:
-                print(f"❌ Some imports failed: {failed_imports}")
-                print("You may need to install additional packages or run with --service flag")
-                return False
-            
-            # Test configuration
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    _ = json.load(f)
-                print("✅ Configuration file is valid JSON")
-            else:
-                print("❌ Configuration file not found")
-                return False
-            
-            print("✅ Installation test passed")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error testing installation: {e}")
-            return False
-    
-    def uninstall_system(self):
-        """Uninstall the system"""
-        try:
-            print("Uninstalling ESP32 Volume Control PC Integration...")
-            
-            # Stop and remove service if installed
-            service_script = self.script_dir / "service_installer.py"
-            if service_script.exists():
-                try:
-                    cmd = [sys.executable, str(service_script), "stop"]
-                    subprocess.run(cmd, capture_output=True)
-                    
-                    cmd = [sys.executable, str(service_script), "remove"]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0:
-                        print("✅ Windows service removed")
-                    else:
-                        print("ℹ️ Service was not installed or already removed")
-                except Exception:
-                    pass
-            
-            # Remove desktop shortcuts
-            desktop = Path.home() / "Desktop"
-            if desktop.exists():
-                batch_files = [
-                    "ESP32 Volume Control.bat",
-                    "ESP32 Volume Control (Console).bat",
-                    "ESP32 Diagnostics.bat",
-                    "ESP32 Service Install.bat",
-                    "ESP32 Service Remove.bat"
-                ]
-                
-                for filename in batch_files:
-                    shortcut = desktop / filename
-                    if shortcut.exists():
-                        shortcut.unlink()
-                        print(f"✅ Removed desktop shortcut: {filename}")
-            
-            # Remove local batch files
-            for filename in batch_files:
-                batch_file = self.script_dir / filename
-                if batch_file.exists():
-                    batch_file.unlink()
-            
-            print("✅ Uninstallation completed")
-            print("Note: Configuration files and logs were preserved")
-            print("You can manually delete them if desired")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error during uninstallation: {e}")
-            return False
-    
-    def print_usage_instructions(self, service_installed=False):
-        """Print usage instructions"""
-        print("\nUsage Instructions:")
-        print("-" * 40)
-        
-        if service_installed:
-            print("The system has been installed as a Windows service.")
-            print("It will start automatically when Windows boots.")
-            print("\nService Management:")
-            print("  - Start service:   python service_installer.py start")
-            print("  - Stop service:    python service_installer.py stop")
-            print("  - Remove service:  python service_installer.py remove")
-        else:
-            print("Manual Operation:")
-            print("  - With system tray: python volume_control.py --tray")
-            print("  - Console mode:     python volume_control.py --no-tray")
-        
-        print("\nDiagnostics:")
-        print("  - Run diagnostics:  python diagnostics.py")
-        print("  - View logs:        Check volume_control.log")
-        
-        print("\nConfiguration:")
-        print(f"  - Config file:      {self.config_file}")
-        print(f"  - Log directory:    {self.log_dir}")
-        
-        print("\nDesktop shortcuts have been created for easy access.")
-
-def main():
-    """Main entry point"""
-    parser = argparse.ArgumentParser(description="ESP32 Volume Control PC Integration Setup")
-    parser.add_argument("--service", action="store_true", help="Install as Windows service")
-    parser.add_argument("--config-only", action="store_true", help="Only create/update configuration")
-    parser.add_argument("--uninstall", action="store_true", help="Uninstall the system")
-    
-    args = parser.parse_args()
-    
-    setup = PCIntegrationSetup()
-    success = setup.run_setup(
-        install_service=args.service,
-        config_only=args.config_only,
-        uninstall=args.uninstall
-    )
-    
-    sys.exit(0 if success else 1)
-
-if __name__ == "__main__":
+"""
+ESP32 Volume Control - PC Integration Setup Script
+=================================================
+
+This script sets up the complete PC integration system including:
+- Installing required dependencies
+- Configuring the system
+- Setting up logging
+- Creating desktop shortcuts
+- Optionally installing as Windows service
+
+Usage:
+    python setup_pc_integration.py [--service] [--config-only] [--uninstall]
+
+Options:
+    --service       Install as Windows service
+    --config-only   Only create/update configuration files
+    --uninstall     Uninstall the system
+
+The MQTT prompts can be answered from the environment for unattended setup:
+ESP32_MQTT_BROKER, ESP32_MQTT_PORT, ESP32_MQTT_USERNAME, ESP32_MQTT_PASSWORD
+
+Author: DJ Kruger
+Version: 1.0.0
+"""
+
+import sys
+import os
+import json
+import pickle
+import importlib
+import importlib.util
+from pathlib import Path
+import logging
+
+# argparse, subprocess, shutil, locale and concurrent.futures are imported by
+# the steps that use them, so --config-only and --uninstall don't load them all
+
+# Launcher batch files created next to the scripts and on the desktop
+_BATCH_FILES = (
+    ("ESP32 Volume Control.bat", "python volume_control.py --tray"),
+    ("ESP32 Volume Control (Console).bat", "python volume_control.py --no-tray"),
+    ("ESP32 Diagnostics.bat", "python diagnostics.py"),
+    ("ESP32 Service Install.bat", "python service_installer.py install"),
+    ("ESP32 Service Remove.bat", "python service_installer.py remove")
+)
+
+# Seconds to wait for a service_installer.py subprocess before giving up
+_SERVICE_COMMAND_TIMEOUT = 30
+
+# Optional fast JSON encoder/decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Setup basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+# Default configuration written by setup_configuration, serialized once so
+# each caller can get an independent deep copy cheaply
+_DEFAULT_CONFIG_BLOB = pickle.dumps({
+    "mqtt": {
+        "broker": "192.168.1.100",
+        "port": 1883,
+        "username": "",
+        "password": "",
+        "client_id": "PCVolumeControl",
+        "keepalive": 60,
+        "qos": 1,
+        "telemetry_qos": 0,
+        "retain": True,
+        "protocol": "MQTTv311"
+    },
+    "topics": {
+        "volume": "homecontrol/volume",
+        "command": "homecontrol/command",
+        "status": "homecontrol/pc/status",
+        "pc_volume": "homecontrol/pc/volume",
+        "app_volume": "homecontrol/pc/app_volume",
+        "pc_power": "homecontrol/pc/power",
+        "pc_system": "homecontrol/pc/system"
+    },
+    "apps": [
+        "chrome.exe",
+        "firefox.exe",
+        "msedge.exe",
+        "spotify.exe",
+        "discord.exe",
+        "vlc.exe",
+        "winamp.exe",
+        "foobar2000.exe",
+        "musicbee.exe",
+        "steam.exe"
+    ],
+    "settings": {
+        "update_rate_limit": 0.1,
+        "sync_interval": 2.0,
+        "reconnect_delay": 5.0,
+        "debug": True,
+        "enable_system_monitoring": True,
+        "enable_tray": True,
+        "monitor_interval": 5,
+        "power_poll_interval": None,
+        "cpu_sample_interval": 15,
+        "status_publish_interval": 60,
+        "log_level": "INFO",
+        "log_file": "volume_control.log",
+        "max_log_size_mb": 10,
+        "backup_log_count": 3
+    },
+    "power_management": {
+        "detect_sleep_wake": True,
+        "notify_esp32_on_sleep": True,
+        "notify_esp32_on_wake": True,
+        "idle_threshold_minutes": 30,
+        "sleep_detection_method": "activity"
+    },
+    "diagnostics": {
+        "enable_performance_monitoring": True,
+        "collect_system_metrics": True,
+        "publish_diagnostics": True,
+        "diagnostic_interval": 300
+    }
+}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _walk(config, prefix=""):
+    """Yield the dotted path of every leaf in a nested configuration"""
+    for key, value in config.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _walk(value, f"{path}.")
+        else:
+            yield path
+
+
+# Dotted leaf paths of the default configuration, for checking a loaded config
+_EXPECTED_KEYS = frozenset(_walk(pickle.loads(_DEFAULT_CONFIG_BLOB)))
+
+
+def _dumps(obj):
+    """Serialize to indented UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch the standard library exception either way
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _prompt(field, text, secret=False):
+    """
+    Ask for a setup value, unless it is provided by the environment
+    
+    Args:
+        field (str): Field name; the ESP32_<field> environment variable overrides the prompt
+        text (str): Prompt shown to the user
+        secret (bool): Read without echoing the input
+    
+    Returns:
+        str: The entered value with surrounding whitespace removed
+    """
+    value = os.environ.get(f"ESP32_{field}")
+    if value is None:
+        if secret:
+            import getpass
+            value = getpass.getpass(text)
+        else:
+            value = input(text)
+    return value.strip()
+
+
+def _probe_import(module):
+    """Return True if the module can be imported"""
+    try:
+        importlib.import_module(module)
+        return True
+    except ImportError:
+        return False
+
+
+def _load_service_installer(service_script):
+    """
+    Load service_installer.py in process
+    
+    Returns:
+        module: The loaded module, or None if pywin32 or the script can't be imported
+    """
+    try:
+        spec = importlib.util.spec_from_file_location("service_installer", service_script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError as e:
+        logger.debug(f"Service installer not importable, using a subprocess: {e}")
+        return None
+
+
+class PCIntegrationSetup:
+    """Setup and configuration manager for PC integration"""
+    
+    def __init__(self):
+        self.script_dir = Path(__file__).parent
+        self.config_file = self.script_dir / "volume_control_config.json"
+        self.log_dir = self.script_dir / "logs"
+        # Configuration as last written or read, so it is parsed at most once
+        self._config = None
+        
+    def run_setup(self, install_service=False, config_only=False, uninstall=False):
+        """Run the complete setup process"""
+        try:
+            print("=" * 60)
+            print("ESP32 Volume Control - PC Integration Setup")
+            print("=" * 60)
+            
+            if uninstall:
+                return self.uninstall_system()
+            
+            if config_only:
+                return self.setup_configuration()
+            
+            # Full installation
+            success = True
+            
+            # Step 1: Check Python version
+            print("1. Checking Python version...")
+            if not self.check_python_version():
+                return False
+            
+            # Step 2: Install dependencies; pip runs in the background while
+            # the configuration, logging and shortcut steps go ahead
+            print("\n2. Installing Python dependencies (in the background)...")
+            pip_install = self._start_dependency_install()
+            
+            # Step 3: Setup configuration
+            print("\n3. Setting up configuration...")
+            if not self.setup_configuration():
+                success = False
+            
+            # Step 4: Setup logging
+            print("\n4. Setting up logging...")
+            if not self.setup_logging():
+                success = False
+            
+            # Step 5: Create shortcuts
+            print("\n5. Creating desktop shortcuts...")
+            if not self.create_shortcuts():
+                success = False
+            
+            # The remaining steps need the dependencies in place
+            print("\nWaiting for dependency installation to finish...")
+            if not self._finish_dependency_install(pip_install):
+                success = False
+            
+            # Step 6: Install service (optional)
+            if install_service:
+                print("\n6. Installing Windows service...")
+                if not self.install_service():
+                    success = False
+            
+            # Step 7: Test installation
+            print("\n7. Testing installation...")
+            if not self.test_installation():
+                success = False
+            
+            if success:
+                print("\n" + "=" * 60)
+                print("Setup completed successfully!")
+                print("=" * 60)
+                self.print_usage_instructions(install_service)
+            else:
+                print("\n" + "=" * 60)
+                print("Setup completed with some errors. Please check the output above.")
+                print("=" * 60)
+            
+            return success
+            
+        except Exception as e:
+            logger.error(f"Setup failed: {e}")
+            return False
+    
+    def check_python_version(self):
+        """Check if Python version is compatible"""
+        try:
+            version = sys.version_info
+            if version.major < 3 or (version.major == 3 and version.minor < 7):
+                print(f"❌ Python {version.major}.{version.minor} is not supported. Python 3.7+ required.")
+                return False
+            
+            print(f"✅ Python {version.major}.{version.minor}.{version.micro} is compatible")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error checking Python version: {e}")
+            return False
+    
+    def install_dependencies(self):
+        """Install required Python packages"""
+        return self._finish_dependency_install(self._start_dependency_install())
+    
+    def _start_dependency_install(self):
+        """
+        Start installing required Python packages in the background
+        
+        Returns:
+            tuple: (pip process, command, log file), or None if pip could not be started
+        """
+        try:
+            import subprocess
+            
+            requirements_file = self.script_dir / "requirements.txt"
+            
+            if not requirements_file.exists():
+                print("❌ requirements.txt not found")
+                return None
+            
+            # Install packages, preferring wheels over building from source;
+            # pip's output goes to a log file rather than into memory
+            cmd = [sys.executable, "-m", "pip", "install", "--prefer-binary",
+                   "--disable-pip-version-check", "--no-input", "-r", str(requirements_file)]
+            self.log_dir.mkdir(exist_ok=True)
+            log_file = open(self.log_dir / "pip_install.log", "wb")
+            try:
+                process = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT)
+            except Exception:
+                log_file.close()
+                raise
+            return process, cmd, log_file
+            
+        except Exception as e:
+            logger.error(f"Error installing dependencies: {e}")
+            return None
+    
+    def _finish_dependency_install(self, install):
+        """
+        Wait for a dependency install started by _start_dependency_install
+        
+        Args:
+            install (tuple): Value returned by _start_dependency_install
+        
+        Returns:
+            bool: True if the packages were installed
+        """
+        if install is None:
+            return False
+        
+        process, cmd, log_file = install
+        try:
+            import subprocess
+            
+            with log_file:
+                returncode = process.wait()
+                
+                if returncode != 0:
+                    print("Retrying without build isolation...")
+                    log_file.flush()
+                    returncode = subprocess.run(cmd + ["--no-build-isolation"],
+                                                stdout=log_file, stderr=subprocess.STDOUT).returncode
+            
+            if returncode == 0:
+                print("✅ Dependencies installed successfully")
+                return True
+            else:
+                log_path = Path(log_file.name)
+                print(f"❌ Failed to install dependencies (see {log_path}):")
+                print(log_path.read_bytes()[-4000:].decode(errors="replace"))
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error installing dependencies: {e}")
+            return False
+    
+    def setup_configuration(self):
+        """Setup configuration files"""
+        try:
+            # Create default configuration if it doesn't exist
+            if not self.config_file.exists():
+                config = self.get_default_config()
+                
+                # Interactive configuration
+                print("\nConfiguring MQTT settings...")
+                broker = _prompt("MQTT_BROKER", f"MQTT Broker IP [{config['mqtt']['broker']}]: ")
+                if broker:
+                    config['mqtt']['broker'] = broker
+                
+                port = _prompt("MQTT_PORT", f"MQTT Port [{config['mqtt']['port']}]: ")
+                if port:
+                    try:
+                        config['mqtt']['port'] = int(port)
+                    except ValueError:
+                        print("Invalid port number, using default")
+                
+                username = _prompt("MQTT_USERNAME", "MQTT Username (optional): ")
+                if username:
+                    config['mqtt']['username'] = username
+                    password = _prompt("MQTT_PASSWORD", "MQTT Password (optional): ", secret=True)
+                    if password:
+                        config['mqtt']['password'] = password
+                
+                # Save configuration
+                self.config_file.write_bytes(_dumps(config))
+                self._config = config
+                
+                print(f"✅ Configuration saved to {self.config_file}")
+            else:
+                print(f"✅ Configuration file already exists: {self.config_file}")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error setting up configuration: {e}")
+            return False
+    
+    def get_default_config(self):
+        """Get a fresh, independently mutable copy of the default configuration"""
+        return pickle.loads(_DEFAULT_CONFIG_BLOB)
+    
+    def setup_logging(self):
+        """Setup logging directories and configuration"""
+        try:
+            # Create logs directory
+            self.log_dir.mkdir(exist_ok=True)
+            
+            # Create logging configuration if it doesn't exist
+            logging_config_file = self.script_dir / "logging_config.json"
+            if logging_config_file.exists():
+                print(f"✅ Logging configuration exists: {logging_config_file}")
+            else:
+                print("❌ Logging configuration not found")
+                return False
+            
+            print(f"✅ Logging directory created: {self.log_dir}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error setting up logging: {e}")
+            return False
+    
+    def create_shortcuts(self):
+        """Create desktop shortcuts"""
+        try:
+            import locale
+            import shutil
+            from concurrent.futures import ThreadPoolExecutor
+            
+            desktop = Path.home() / "Desktop"
+            
+            # Create batch files for easy launching, each written in one
+            # call in the encoding text mode used
+            encoding = locale.getpreferredencoding(False)
+            for filename, command in _BATCH_FILES:
+                body = f"@echo off\r\ncd /d \"{self.script_dir}\"\r\n{command}\r\npause\r\n"
+                (self.script_dir / filename).write_bytes(body.encode(encoding))
+            
+            # Copy to desktop if it exists; copies run concurrently since
+            # the desktop may be a slow synced or network folder
+            if desktop.exists():
+                def copy_to_desktop(filename):
+                    try:
+                        shutil.copy2(self.script_dir / filename, desktop / filename)
+                    except Exception:
+                        pass  # Don't fail if we can't copy to desktop
+                
+                with ThreadPoolExecutor(max_workers=len(_BATCH_FILES)) as executor:
+                    list(executor.map(copy_to_desktop, (filename for filename, _ in _BATCH_FILES)))
+            
+            print("✅ Batch files created")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error creating shortcuts: {e}")
+            return False
+    
+    def install_service(self):
+        """Install Windows service"""
+        try:
+            import subprocess
+            
+            service_script = self.script_dir / "service_installer.py"
+            
+            if not service_script.exists():
+                print("❌ Service installer not found")
+                return False
+            
+            # Run the installer in this process when possible rather than
+            # starting a new interpreter for every command
+            installer = _load_service_installer(service_script)
+            
+            # Install service
+            if installer is not None:
+                installed, error = installer.ServiceManager.run("install"), ""
+            else:
+                cmd = [sys.executable, str(service_script), "install"]
+                result = subprocess.run(cmd, capture_output=True, text=True,
+                                        timeout=_SERVICE_COMMAND_TIMEOUT)
+                installed, error = result.returncode == 0, result.stderr
+            
+            if installed:
+                print("✅ Windows service installed successfully")
+                
+                # Ask if user wants to start the service
+                start_service = input("Start the service now? (y/n): ").strip().lower()
+                if start_service == 'y':
+                    if installer is not None:
+                        started, error = installer.ServiceManager.run("start"), ""
+                    else:
+                        cmd = [sys.executable, str(service_script), "start"]
+                        result = subprocess.run(cmd, capture_output=True, text=True,
+                                                timeout=_SERVICE_COMMAND_TIMEOUT)
+                        started, error = result.returncode == 0, result.stderr
+                    if started:
+                        print("✅ Service started successfully")
+                    else:
+                        print(f"❌ Failed to start service: {error}")
+                
+                return True
+            else:
+                print(f"❌ Failed to install service: {error}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error installing service: {e}")
+            return False
+    
+    def test_installation(self):
+        """Test the installation"""
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+            
+            # Test imports
+            print("Testing imports...")
+            
+            test_imports = [
+                "pycaw.pycaw",
+                "paho.mqtt.client",
+                "psutil",
+                "pystray",
+                "PIL"
+            ]
+            
+            # Import concurrently so the cold-import disk reads overlap;
+            # map() keeps the results in list order for the report
+            with ThreadPoolExecutor(max_workers=len(test_imports)) as executor:
+                results = list(executor.map(_probe_import, test_imports))
+            
+            failed_imports = []
+            for module, ok in zip(test_imports, results):
+                if ok:
+                    print(f"  ✅ {module}")
+                else:
+                    print(f"  ❌ {module}")
+                    failed_imports.append(module)
+            
+            if failed_imports:
+                print(f"❌ Some imports failed: {failed_imports}")
+                print("You may need to install additional packages or run with --service flag")
+                return False
+            
+            # Test configuration
+            if self.config_file.exists():
+                if self._config is None:
+                    self._config = _loads(self.config_file.read_bytes())
+                print("✅ Configuration file is valid JSON")
+                
+                missing = sorted(_EXPECTED_KEYS.difference(_walk(self._config)))
+                if missing:
+                    print(f"ℹ️ Configuration is missing keys, defaults will be used: {missing}")
+            else:
+                print("❌ Configuration file not found")
+                return False
+            
+            print("✅ Installation test passed")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error testing installation: {e}")
+            return False
+    
+    def uninstall_system(self):
+        """Uninstall the system"""
+        try:
+            import subprocess
+            
+            print("Uninstalling ESP32 Volume Control PC Integration...")
+            
+            # Stop and remove service if installed
+            service_script = self.script_dir / "service_installer.py"
+            if service_script.exists():
+                try:
+                    installer = _load_service_installer(service_script)
+                    if installer is not None:
+                        # remove stops a running service first
+                        removed = installer.ServiceManager.run("remove")
+                    else:
+                        # remove stops a running service first, so one
+                        # interpreter start covers both steps
+                        cmd = [sys.executable, str(service_script), "remove"]
+                        result = subprocess.run(cmd, capture_output=True, text=True,
+                                                timeout=_SERVICE_COMMAND_TIMEOUT)
+                        removed = result.returncode == 0
+                    if removed:
+                        print("✅ Windows service removed")
+                    else:
+                        print("ℹ️ Service was not installed or already removed")
+                except Exception:
+                    pass
+            
+            # Remove desktop shortcuts
+            desktop = Path.home() / "Desktop"
+            if desktop.exists():
+                for filename, _ in _BATCH_FILES:
+                    shortcut = desktop / filename
+                    if shortcut.exists():
+                        shortcut.unlink()
+                        print(f"✅ Removed desktop shortcut: {filename}")
+            
+            # Remove local batch files
+            for filename, _ in _BATCH_FILES:
+                batch_file = self.script_dir / filename
+                if batch_file.exists():
+                    batch_file.unlink()
+            
+            print("✅ Uninstallation completed")
+            print("Note: Configuration files and logs were preserved")
+            print("You can manually delete them if desired")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error during uninstallation: {e}")
+            return False
+    
+    def print_usage_instructions(self, service_installed=False):
+        """Print usage instructions"""
+        print("\nUsage Instructions:")
+        print("-" * 40)
+        
+        if service_installed:
+            print("The system has been installed as a Windows service.")
+            print("It will start automatically when Windows boots.")
+            print("\nService Management:")
+            print("  - Start service:   python service_installer.py start")
+            print("  - Stop service:    python service_installer.py stop")
+            print("  - Remove service:  python service_installer.py remove")
+        else:
+            print("Manual Operation:")
+            print("  - With system tray: python volume_control.py --tray")
+            print("  - Console mode:     python volume_control.py --no-tray")
+        
+        print("\nDiagnostics:")
+        print("  - Run diagnostics:  python diagnostics.py")
+        print("  - View logs:        Check volume_control.log")
+        
+        print("\nConfiguration:")
+        print(f"  - Config file:      {self.config_file}")
+        print(f"  - Log directory:    {self.log_dir}")
+        
+        print("\nDesktop shortcuts have been created for easy access.")
+
+def main():
+    """Main entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="ESP32 Volume Control PC Integration Setup")
+    parser.add_argument("--service", action="store_true", help="Install as Windows service")
+    parser.add_argument("--config-only", action="store_true", help="Only create/update configuration")
+    parser.add_argument("--uninstall", action="store_true", help="Uninstall the system")
+    
+    args = parser.parse_args()
+    
+    setup = PCIntegrationSetup()
+    success = setup.run_setup(
+        install_service=args.service,
+        config_only=args.config_only,
+        uninstall=args.uninstall
+    )
+    
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
     main()
\ No newline at end of file